@@ -0,0 +1,273 @@
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import timedelta, datetime, timezone
+from pathlib import Path
+from typing import Sequence, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from http_clients import HttpClientPool  # noqa: E402
+from constants import UPSTREAM_RATE_LIMIT_BURST, UPSTREAM_MAX_CONCURRENT_REQUESTS  # noqa: E402
+from models import SearchOptions  # noqa: E402
+from providers import (  # noqa: E402
+    SkriptLangDocumentationProvider,
+    SkriptHubDocumentationProvider,
+    SkUnityDocumentationProvider,
+    CachedDocumentationProvider,
+    CombinedDocumentationProvider,
+    DocumentationProvider,
+)
+from scheduling import RequestScheduler  # noqa: E402
+from stub_servers import (  # noqa: E402
+    StubBehaviour,
+    StubServer,
+    create_skriptlang_stub,
+    create_skripthub_stub,
+    create_skunity_stub,
+)
+from views import SearchView  # noqa: E402
+
+QUERY_CORPUS = (
+    "set block",
+    "loop",
+    "teleport",
+    "damage",
+    "player",
+    "send message",
+    "give item",
+    "location",
+    "inventory",
+    "spawn entity",
+    "cancel event",
+    "variable",
+    "list",
+    "chat",
+    "potion effect",
+    "region",
+    "command",
+    "function",
+    "teleprt",
+    "dammage",
+    "world time",
+    "break block",
+    "drop",
+    "sound",
+    "firework",
+)
+
+
+def _build_query_stream(count: int, seed: int) -> list[str]:
+    # popular queries are asked far more often than the rest, like in real guilds
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(QUERY_CORPUS) + 1)]
+    return rng.choices(QUERY_CORPUS, weights=weights, k=count)
+
+
+def _percentile(sorted_values: Sequence[float], percentile: float) -> float:
+    index = min(len(sorted_values) - 1, round(percentile / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+async def _run_level(
+    provider: CombinedDocumentationProvider,
+    queries: Sequence[str],
+    concurrency: int,
+) -> dict:
+    latencies = []
+    result_counts = []
+    failures = 0
+    query_iterator = iter(queries)
+
+    async def worker():
+        nonlocal failures
+        for query in query_iterator:
+            start_time = time.perf_counter()
+            # noinspection PyBroadException
+            try:
+                results = await provider.perform_search(SearchOptions(query=query))
+                if len(results) > 0:
+                    await SearchView.generate_embed(results[0])
+                result_counts.append(len(results))
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed_time = time.perf_counter() - start_time
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "failures": failures,
+        "throughput_rps": len(latencies) / elapsed_time,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "mean_result_count": statistics.fmean(result_counts) if result_counts else 0,
+    }
+
+
+def _create_scheduler_factory(rate_limit: float) -> Callable[[], RequestScheduler]:
+    if rate_limit == 0:
+        # effectively unlimited, so that the measured latency is not just the time spent waiting
+        # for the local rate limiter
+        return lambda: RequestScheduler(
+            rate=1_000_000,
+            burst=1_000_000,
+            max_concurrency=1_000_000,
+            max_queued=1_000_000,
+        )
+    return lambda: RequestScheduler(
+        rate=rate_limit,
+        burst=UPSTREAM_RATE_LIMIT_BURST,
+        max_concurrency=UPSTREAM_MAX_CONCURRENT_REQUESTS,
+    )
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ("git", "rev-parse", "HEAD"),
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _create_providers(
+    http_clients: HttpClientPool,
+    skriptlang_stub: StubServer,
+    skripthub_stub: StubServer,
+    skunity_stub: StubServer,
+    no_cache: bool,
+) -> list[DocumentationProvider]:
+    providers: list[DocumentationProvider] = [
+        SkriptLangDocumentationProvider(
+            http_clients, docs_url=f"{skriptlang_stub.base_url}/docs.json"
+        )
+    ]
+    remote_providers = (
+        SkriptHubDocumentationProvider(
+            http_clients, "token", f"{skripthub_stub.base_url}/api/v1"
+        ),
+        SkUnityDocumentationProvider(http_clients, "key", f"{skunity_stub.base_url}/v1"),
+    )
+    for remote_provider in remote_providers:
+        if no_cache:
+            providers.append(remote_provider)
+        else:
+            providers.append(CachedDocumentationProvider(remote_provider))
+    return providers
+
+
+async def run_benchmark(arguments: argparse.Namespace) -> dict:
+    behaviour = StubBehaviour(
+        latency=timedelta(milliseconds=arguments.latency_ms),
+        jitter=timedelta(milliseconds=arguments.jitter_ms),
+        failure_rate=arguments.failure_rate,
+        payload_size=arguments.payload_size,
+    )
+    skriptlang_stub = create_skriptlang_stub(behaviour)
+    skripthub_stub = create_skripthub_stub(behaviour)
+    skunity_stub = create_skunity_stub(behaviour)
+    stubs = (skriptlang_stub, skripthub_stub, skunity_stub)
+    results = []
+    async with skriptlang_stub, skripthub_stub, skunity_stub:
+        for concurrency in arguments.concurrency:
+            # every level starts from cold caches so that the levels can be compared
+            SearchView.embed_cache.clear()
+            async with HttpClientPool(
+                scheduler_factory=_create_scheduler_factory(arguments.rate_limit)
+            ) as http_clients:
+                providers = _create_providers(
+                    http_clients,
+                    skriptlang_stub,
+                    skripthub_stub,
+                    skunity_stub,
+                    arguments.no_cache,
+                )
+                combined_provider = CombinedDocumentationProvider(providers)
+                # the first search loads the SkriptLang catalog, which is not what is being measured
+                await combined_provider.perform_search(SearchOptions(query="warm up"))
+                for stub in stubs:
+                    stub.request_count = 0
+
+                level_result = await _run_level(
+                    combined_provider,
+                    _build_query_stream(arguments.requests, arguments.seed),
+                    concurrency,
+                )
+                level_result["upstream_requests"] = sum(
+                    stub.request_count for stub in stubs
+                )
+                await asyncio.gather(*(provider.close() for provider in providers))
+            results.append(level_result)
+            print(
+                f"concurrency {concurrency:>3}: p50 {level_result['p50_ms']:8.2f}ms "
+                f"p95 {level_result['p95_ms']:8.2f}ms p99 {level_result['p99_ms']:8.2f}ms "
+                f"{level_result['throughput_rps']:8.1f} req/s "
+                f"({level_result['failures']} failures, "
+                f"{level_result['upstream_requests']} upstream requests)"
+            )
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "configuration": {
+            "latency_ms": arguments.latency_ms,
+            "jitter_ms": arguments.jitter_ms,
+            "failure_rate": arguments.failure_rate,
+            "payload_size": arguments.payload_size,
+            "requests": arguments.requests,
+            "cache": not arguments.no_cache,
+            "rate_limit": arguments.rate_limit if arguments.rate_limit != 0 else None,
+            "seed": arguments.seed,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures end-to-end /docs latency against local stub providers"
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--payload-size", type=int, default=25)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0,
+        help="requests per second per stub host as the bot would send them, 0 for unlimited",
+    )
+    parser.add_argument("--seed", type=int, default=920)
+    parser.add_argument("--output", type=Path, default=Path("bench_output.json"))
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    report = asyncio.run(run_benchmark(arguments))
+    arguments.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import asyncio
+import copy
+import json
+import logging
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import providers  # noqa: E402
+from http_clients import HttpClientPool  # noqa: E402
+from models import SyntaxType  # noqa: E402
+from providers import (  # noqa: E402
+    SkriptHubDocumentationProvider,
+    SkUnityDocumentationProvider,
+    MirroredDocumentationProvider,
+)
+from scheduling import RequestScheduler  # noqa: E402
+from snapshots import CatalogSnapshotFile  # noqa: E402
+from stub_servers import StubBehaviour, StubServer, StubResponse  # noqa: E402
+
+FIXTURES_PATH = Path(__file__).resolve().parent / "fixtures"
+INSTANT = StubBehaviour(latency=timedelta(), jitter=timedelta())
+
+
+def _load_fixture(name: str):
+    return json.loads((FIXTURES_PATH / name).read_text())
+
+
+def _create_http_clients() -> HttpClientPool:
+    return HttpClientPool(
+        scheduler_factory=lambda: RequestScheduler(
+            rate=1_000_000, burst=1_000_000, max_concurrency=1_000_000
+        )
+    )
+
+
+async def check_skripthub_bulk_conversion(http_clients: HttpClientPool) -> None:
+    fixture = _load_fixture("skripthub_syntax.json")
+    stub = StubServer(INSTANT)
+    stub.route(r"/api/v1/syntax/", lambda path, query, headers: (200, fixture, {"ETag": '"v1"'}))
+    async with stub:
+        provider = SkriptHubDocumentationProvider(http_clients, "token", f"{stub.base_url}/api/v1")
+        download = await provider.download_catalog(None, None)
+
+    elements = {element.id: element for element in download.elements}
+    assert sorted(elements) == [1012, 1194, 4211, 7310], sorted(elements)
+    assert elements[1012].patterns == (
+        "teleport %entities% (to|%direction%) %location%",
+        'teleport %entities% to %location% without "rotation"',
+    )
+    assert elements[1012].examples is None
+    assert elements[1194].event_values == ("event-entity", "event-world", "event-damagecause")
+    assert elements[1194].cancellable is True
+    assert elements[4211].type == SyntaxType.CLASSINFO
+    assert elements[7310].required_plugins == ("WorldGuard",)
+    assert download.etag == '"v1"'
+
+
+async def check_skunity_bulk_conversion(http_clients: HttpClientPool) -> None:
+    fixture = _load_fixture("skunity_all_syntax.json")
+    stub = StubServer(INSTANT)
+    stub.route(r"/v1/[^/]+/docs/getAllSyntax", lambda path, query, headers: (200, fixture, {}))
+    async with stub:
+        provider = SkUnityDocumentationProvider(http_clients, "key", f"{stub.base_url}/v1")
+        download = await provider.download_catalog(None, None)
+
+    elements = {element.id: element for element in download.elements}
+    assert sorted(elements) == ["1033", "2048", "512", "780"], sorted(elements)
+    assert elements["512"].type == SyntaxType.EFFECT
+    assert elements["780"].patterns[1] == "%players% (isn't|is not|aren't|are not) flying"
+    assert elements["1033"].event_values == ("event-player", "event-world")
+    assert elements["2048"].type == SyntaxType.EXPRESSION
+    assert elements["2048"].return_type == "Number"
+
+
+async def check_incremental_example_sync(http_clients: HttpClientPool) -> None:
+    fixture = _load_fixture("skunity_all_syntax.json")
+    example_requests = []
+
+    def handle_all_syntax(path, query, headers) -> StubResponse:
+        return 200, fixture, {}
+
+    def handle_examples(path, query, headers) -> StubResponse:
+        element_id = path.rsplit("/", 1)[1]
+        example_requests.append(element_id)
+        return 200, {"result": {"0": {"example": f"example of {element_id}"}}}, {}
+
+    stub = StubServer(INSTANT)
+    stub.route(r"/v1/[^/]+/docs/getAllSyntax", handle_all_syntax)
+    stub.route(r"/v1/[^/]+/docs/getExamplesByID/[^/]+", handle_examples)
+    # small batches so that the snapshot has to be saved several times during one sync
+    providers.MIRROR_EXAMPLE_SYNC_BATCH_SIZE = 2
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = Path(directory) / "skunity-catalog.bin"
+        async with stub:
+            provider = SkUnityDocumentationProvider(http_clients, "key", f"{stub.base_url}/v1")
+            mirrored_provider = MirroredDocumentationProvider(provider, snapshot_path)
+            snapshot_saves = 0
+            save_snapshot = mirrored_provider.catalog.save_snapshot
+
+            async def count_snapshot_saves() -> None:
+                nonlocal snapshot_saves
+                snapshot_saves += 1
+                await save_snapshot()
+
+            mirrored_provider.catalog.save_snapshot = count_snapshot_saves
+
+            await mirrored_provider.catalog.refresh()
+            # noinspection PyProtectedMember
+            await mirrored_provider._example_sync
+            assert sorted(example_requests) == ["1033", "2048", "512", "780"], example_requests
+            # once after the download and once per batch of two elements
+            assert snapshot_saves == 3, snapshot_saves
+            assert len(provider.examples_cache) == 0, "the sync must not fill the interactive cache"
+
+            # one changed and one new element
+            fixture = copy.deepcopy(fixture)
+            fixture["result"]["0"]["desc"] = "Sends a message to the given players."
+            fixture["result"]["5"] = {**fixture["result"]["3"], "id": "4096", "name": "Player Food"}
+            example_requests.clear()
+            await mirrored_provider.catalog.refresh()
+            # noinspection PyProtectedMember
+            await mirrored_provider._example_sync
+            assert sorted(example_requests) == ["4096", "512"], example_requests
+
+        snapshot_state = CatalogSnapshotFile(snapshot_path, provider).load()
+        examples = {element.id: element.examples for element in snapshot_state.elements}
+        assert examples == {
+            element_id: (f"example of {element_id}",)
+            for element_id in ("512", "780", "1033", "2048", "4096")
+        }, examples
+        await mirrored_provider.close()
+
+
+async def check_example_sync_retries(http_clients: HttpClientPool) -> None:
+    fixture = _load_fixture("skunity_all_syntax.json")
+    failing_element_ids = {"780"}
+    example_requests = []
+
+    def handle_all_syntax(path, query, headers) -> StubResponse:
+        if headers.get("if-none-match") == '"v1"':
+            return 304, None, {"ETag": '"v1"'}
+        return 200, fixture, {"ETag": '"v1"'}
+
+    def handle_examples(path, query, headers) -> StubResponse:
+        element_id = path.rsplit("/", 1)[1]
+        example_requests.append(element_id)
+        if element_id in failing_element_ids:
+            return 500, {"detail": "stub failure"}, {}
+        return 200, {"result": {"0": {"example": f"example of {element_id}"}}}, {}
+
+    stub = StubServer(INSTANT)
+    stub.route(r"/v1/[^/]+/docs/getAllSyntax", handle_all_syntax)
+    stub.route(r"/v1/[^/]+/docs/getExamplesByID/[^/]+", handle_examples)
+    async with stub:
+        provider = SkUnityDocumentationProvider(http_clients, "key", f"{stub.base_url}/v1")
+        mirrored_provider = MirroredDocumentationProvider(provider)
+        await mirrored_provider.catalog.refresh()
+        # noinspection PyProtectedMember
+        await mirrored_provider._example_sync
+        assert sorted(example_requests) == ["1033", "2048", "512", "780"], example_requests
+
+        # an unchanged catalog still retries the element that failed
+        failing_element_ids.clear()
+        example_requests.clear()
+        await mirrored_provider.catalog.refresh()
+        # noinspection PyProtectedMember
+        await mirrored_provider._example_sync
+        assert example_requests == ["780"], example_requests
+
+        # a host asking to retry much later pauses the sync instead of going through every element
+        for element in mirrored_provider.catalog.state.elements:
+            element.examples = None
+        http_clients.scheduler_for(stub.base_url).block_for(timedelta(minutes=10))
+        example_requests.clear()
+        # noinspection PyProtectedMember
+        await mirrored_provider._sync_examples(mirrored_provider.catalog.state.elements)
+        assert example_requests == [], example_requests
+        await mirrored_provider.close()
+
+
+async def run_checks() -> None:
+    async with _create_http_clients() as http_clients:
+        for check in (
+            check_skripthub_bulk_conversion,
+            check_skunity_bulk_conversion,
+            check_incremental_example_sync,
+            check_example_sync_retries,
+        ):
+            await check(http_clients)
+            print(f"{check.__name__}: ok")
+
+
+def main():
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(run_checks())
+
+
+if __name__ == "__main__":
+    main()
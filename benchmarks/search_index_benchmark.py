@@ -0,0 +1,123 @@
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from models import SyntaxElement, SyntaxType  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+
+CATALOG_SIZES = (1_000, 4_000, 16_000, 64_000)
+QUERIES = (
+    "set block",
+    "loop",
+    "teleport",
+    "damage",
+    "is",
+    "xyzzy",
+    "player",
+    "teleprt",
+    "dammage",
+)
+WORDS = (
+    "set block loop player teleport damage entity world location item inventory "
+    "spawn break place drop give remove add send message chat event cancel "
+    "variable list number text time date region location vector potion effect "
+    "command argument function return type expression condition section"
+).split()
+FILLER_WORD_COUNT = 5_000
+REPETITIONS = 20
+
+
+def _linear_match_level(query: str, element: SyntaxElement) -> Optional[int]:
+    casefolded_query = query.casefold()
+    casefolded_element_name = element.name.casefold()
+    if casefolded_element_name == casefolded_query:
+        return 1
+    name_matches = casefolded_query in casefolded_element_name
+    description_matches = casefolded_query in element.description.casefold()
+    if name_matches and description_matches:
+        return 2
+    elif name_matches:
+        return 3
+    elif description_matches:
+        return 4
+    else:
+        return None
+
+
+def _linear_search(
+    elements: Sequence[SyntaxElement], query: str
+) -> list[SyntaxElement]:
+    matching_elements = [
+        element
+        for element in elements
+        if _linear_match_level(query, element) is not None
+    ]
+    matching_elements.sort(key=lambda element: _linear_match_level(query, element))
+    return matching_elements
+
+
+def _generate_catalog(size: int, seed: int = 920) -> list[SyntaxElement]:
+    rng = random.Random(seed)
+    vocabulary = list(WORDS)
+    for _ in range(FILLER_WORD_COUNT):
+        vocabulary.append(
+            "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 10)))
+        )
+    return [
+        SyntaxElement(
+            id=f"element{index}",
+            provider=None,
+            name=" ".join(rng.choices(vocabulary, k=rng.randint(1, 4))).title(),
+            description=" ".join(rng.choices(vocabulary, k=rng.randint(10, 40))),
+            patterns=(),
+            examples=None,
+            required_addon="Skript",
+            required_addon_version=None,
+            required_minecraft_version=None,
+            type=rng.choice(tuple(SyntaxType)),
+            required_plugins=None,
+            return_type=None,
+            event_values=None,
+            cancellable=None,
+            link=None,
+        )
+        for index in range(size)
+    ]
+
+
+def _time_per_query(search, repetitions: int = REPETITIONS) -> float:
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for query in QUERIES:
+            search(query)
+    return (time.perf_counter() - start) / (repetitions * len(QUERIES))
+
+
+def main():
+    print(f"{'catalog size':>12} {'build (ms)':>11} {'linear (us)':>12} {'index (us)':>11} {'speedup':>8}")
+    for size in CATALOG_SIZES:
+        elements = _generate_catalog(size)
+        build_start = time.perf_counter()
+        search_index = SearchIndex(elements)
+        build_time = time.perf_counter() - build_start
+        for query in QUERIES:
+            linear_results = _linear_search(elements, query)
+            # fuzzy matches are only ever ranked after the exact ones
+            if search_index.search(query)[: len(linear_results)] != linear_results:
+                raise AssertionError(f"Index ranking differs for query {query!r}")
+        linear_time = _time_per_query(
+            lambda query: _linear_search(elements, query), repetitions=2
+        )
+        index_time = _time_per_query(search_index.search)
+        print(
+            f"{size:>12} {build_time * 1e3:>11.1f} {linear_time * 1e6:>12.0f} "
+            f"{index_time * 1e6:>11.0f} {linear_time / index_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
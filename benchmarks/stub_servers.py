@@ -0,0 +1,280 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Optional
+from urllib.parse import urlsplit, parse_qs, unquote
+
+WORDS = (
+    "set block loop player teleport damage entity world location item inventory "
+    "spawn break place drop give remove add send message chat event cancel "
+    "variable list number text time date region vector potion effect command "
+    "argument function return type expression condition section health food "
+    "experience level weather biome chunk sign book banner firework sound"
+).split()
+SKRIPTLANG_CATEGORIES = (
+    "conditions",
+    "effects",
+    "expressions",
+    "events",
+    "classes",
+    "structures",
+    "sections",
+    "functions",
+)
+SKRIPTHUB_SYNTAX_TYPES = ("effect", "condition", "expression", "event", "type")
+SKUNITY_DOCS = ("effects", "conditions", "expression", "events", "types")
+
+# status, JSON body, extra headers
+StubResponse = tuple[int, object, dict[str, str]]
+StubHandler = Callable[[str, dict[str, list[str]], dict[str, str]], StubResponse]
+
+
+@dataclass
+class StubBehaviour:
+    latency: timedelta = timedelta(milliseconds=50)
+    jitter: timedelta = timedelta(milliseconds=10)
+    failure_rate: float = 0.0
+    # number of elements returned by searches and per SkriptLang category
+    payload_size: int = 25
+
+
+def _generate_words(rng: random.Random, minimum: int, maximum: int) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(minimum, maximum)))
+
+
+def _seed_for(*parts: str) -> int:
+    return int.from_bytes(hashlib.sha256("\0".join(parts).encode()).digest()[:8], "big")
+
+
+class StubServer:
+    def __init__(self, behaviour: StubBehaviour, seed: int = 920):
+        self.behaviour = behaviour
+        self.rng = random.Random(seed)
+        self.routes: list[tuple[re.Pattern, StubHandler]] = []
+        self.request_count = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def route(self, pattern: str, handler: StubHandler) -> None:
+        self.routes.append((re.compile(pattern), handler))
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle_connection, "127.0.0.1", 0
+        )
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "StubServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    def _respond(self, target: str, headers: dict[str, str]) -> StubResponse:
+        if self.rng.random() < self.behaviour.failure_rate:
+            return 500, {"detail": "stub failure"}, {}
+        split_target = urlsplit(target)
+        path = unquote(split_target.path)
+        for pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match is not None:
+                return handler(path, parse_qs(split_target.query), headers)
+        return 404, {"detail": "not found"}, {}
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if request_line == b"":
+                    break
+                _, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header_line.decode("latin-1").partition(":")
+                    headers[name.strip().casefold()] = value.strip()
+                self.request_count += 1
+                delay = self.behaviour.latency.total_seconds() + self.rng.uniform(
+                    0, self.behaviour.jitter.total_seconds()
+                )
+                await asyncio.sleep(delay)
+                status, body, extra_headers = self._respond(target, headers)
+                payload = b"" if body is None else json.dumps(body).encode()
+                response_headers = {
+                    "Content-Type": "application/json",
+                    "Content-Length": str(len(payload)),
+                    "Connection": "keep-alive",
+                    **extra_headers,
+                }
+                writer.write(
+                    f"HTTP/1.1 {status} STUB\r\n".encode()
+                    + "".join(
+                        f"{name}: {value}\r\n" for name, value in response_headers.items()
+                    ).encode()
+                    + b"\r\n"
+                    + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def create_skriptlang_stub(behaviour: StubBehaviour) -> StubServer:
+    server = StubServer(behaviour)
+    rng = random.Random(_seed_for("skriptlang"))
+    catalog = {
+        category: [
+            {
+                "id": f"{category}{index}",
+                "name": _generate_words(rng, 1, 4).title(),
+                "description": [_generate_words(rng, 8, 30)],
+                "patterns": [_generate_words(rng, 2, 6)],
+                "examples": [_generate_words(rng, 3, 10)],
+                "since": ["2.7"],
+            }
+            for index in range(behaviour.payload_size)
+        ]
+        for category in SKRIPTLANG_CATEGORIES
+    }
+    etag = f'"{hashlib.sha256(json.dumps(catalog).encode()).hexdigest()[:16]}"'
+
+    def handle_docs(path, query, headers) -> StubResponse:
+        if headers.get("if-none-match") == etag:
+            return 304, None, {"ETag": etag}
+        return 200, catalog, {"ETag": etag}
+
+    server.route(r"/docs\.json", handle_docs)
+    return server
+
+
+def _generate_skripthub_element(element_id: int, name: str, rng: random.Random) -> dict:
+    return {
+        "id": element_id,
+        "title": name,
+        "description": _generate_words(rng, 8, 30),
+        "syntax_pattern": _generate_words(rng, 2, 6),
+        "addon": rng.choice(("Skript", "SkBee", "skript-reflect", "SkQuery")),
+        "compatible_addon_version": "2.7",
+        "compatible_minecraft_version": "1.20",
+        "syntax_type": rng.choice(SKRIPTHUB_SYNTAX_TYPES),
+        "required_plugins": [],
+        "return_type": None,
+        "event_values": None,
+        "event_cancellable": None,
+        "link": f"https://skripthub.net/docs/?id={element_id}",
+    }
+
+
+def create_skripthub_stub(behaviour: StubBehaviour) -> StubServer:
+    server = StubServer(behaviour)
+
+    def handle_syntax(path, query, headers) -> StubResponse:
+        search = query.get("search", [""])[0]
+        rng = random.Random(_seed_for("skripthub", search))
+        if search == "":
+            count = behaviour.payload_size * 40
+        else:
+            count = rng.randint(0, behaviour.payload_size)
+        return (
+            200,
+            [
+                _generate_skripthub_element(
+                    _seed_for(search, str(index)) % 100_000,
+                    f"{search} {_generate_words(rng, 0, 2)}".strip().title(),
+                    rng,
+                )
+                for index in range(count)
+            ],
+            {},
+        )
+
+    def handle_examples(path, query, headers) -> StubResponse:
+        syntax_id = query.get("syntax", [""])[0]
+        rng = random.Random(_seed_for("skripthub-example", syntax_id))
+        return 200, [{"example_code": _generate_words(rng, 3, 12)}], {}
+
+    server.route(r"/api/v1/syntax/", handle_syntax)
+    server.route(r"/api/v1/syntaxexample/", handle_examples)
+    return server
+
+
+def _generate_skunity_element(element_id: str, name: str, rng: random.Random) -> dict:
+    return {
+        "id": element_id,
+        "name": name,
+        "desc": _generate_words(rng, 8, 30),
+        "pattern": _generate_words(rng, 2, 6),
+        "addon": rng.choice(("Skript", "SkBee", "skript-reflect", "SkQuery")),
+        "version": "2.7",
+        "doc": rng.choice(SKUNITY_DOCS),
+        "plugin": [],
+        "returntype": None,
+        "eventvalues": None,
+    }
+
+
+def create_skunity_stub(behaviour: StubBehaviour) -> StubServer:
+    server = StubServer(behaviour)
+
+    def handle_search(path, query, headers) -> StubResponse:
+        search = path.rsplit("/", 1)[1].replace("+", " ")
+        rng = random.Random(_seed_for("skunity", search))
+        return (
+            200,
+            {
+                "result": [
+                    _generate_skunity_element(
+                        str(_seed_for(search, str(index)) % 100_000),
+                        f"{search} {_generate_words(rng, 0, 2)}".strip().title(),
+                        rng,
+                    )
+                    for index in range(rng.randint(0, behaviour.payload_size))
+                ]
+            },
+            {},
+        )
+
+    def handle_all_syntax(path, query, headers) -> StubResponse:
+        rng = random.Random(_seed_for("skunity-all"))
+        return (
+            200,
+            {
+                "result": {
+                    str(index): _generate_skunity_element(
+                        str(index), _generate_words(rng, 1, 4).title(), rng
+                    )
+                    for index in range(behaviour.payload_size * 40)
+                }
+            },
+            {},
+        )
+
+    def handle_examples(path, query, headers) -> StubResponse:
+        element_id = path.rsplit("/", 1)[1]
+        rng = random.Random(_seed_for("skunity-example", element_id))
+        return 200, {"result": {"0": {"example": _generate_words(rng, 3, 12)}}}, {}
+
+    server.route(r"/v1/[^/]+/docs/search/.*", handle_search)
+    server.route(r"/v1/[^/]+/docs/getAllSyntax", handle_all_syntax)
+    server.route(r"/v1/[^/]+/docs/getExamplesByID/[^/]+", handle_examples)
+    return server
@@ -0,0 +1,98 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Sequence, Iterable
+
+from constants import AUTOCOMPLETE_MAX_REMOTE_NAMES
+from models import SyntaxElement
+
+
+def _compute_keys(name: str) -> list[tuple[str, str]]:
+    words = name.casefold().split()
+    if len(words) == 0:
+        return [(name.casefold(), name)]
+    return [(" ".join(words[word_index:]), name) for word_index in range(len(words))]
+
+
+def _scan_prefix(
+    keys: Sequence[tuple[str, str]], prefix: str, limit: int, found: dict[str, None]
+) -> None:
+    index = bisect_left(keys, (prefix, ""))
+    while index < len(keys) and len(found) < limit:
+        key, name = keys[index]
+        if not key.startswith(prefix):
+            break
+        found.setdefault(name)
+        index += 1
+
+
+class _NameKeys:
+    def __init__(self):
+        # keys for the full name, and for every trailing run of words in the name
+        self.name_keys: list[tuple[str, str]] = []
+        self.word_keys: list[tuple[str, str]] = []
+
+    def add(self, name: str) -> None:
+        name_key, *word_keys = _compute_keys(name)
+        insort(self.name_keys, name_key)
+        for word_key in word_keys:
+            insort(self.word_keys, word_key)
+
+    def remove(self, name: str) -> None:
+        name_key, *word_keys = _compute_keys(name)
+        removals = [(self.name_keys, name_key)]
+        removals += [(self.word_keys, word_key) for word_key in word_keys]
+        for keys, key in removals:
+            index = bisect_left(keys, key)
+            if index < len(keys) and keys[index] == key:
+                del keys[index]
+
+    @staticmethod
+    def build(names: Iterable[str]) -> "_NameKeys":
+        name_keys = _NameKeys()
+        for name in names:
+            name_key, *word_keys = _compute_keys(name)
+            name_keys.name_keys.append(name_key)
+            name_keys.word_keys += word_keys
+        name_keys.name_keys.sort()
+        name_keys.word_keys.sort()
+        return name_keys
+
+
+class NameIndex:
+    def __init__(self, max_remote_names: int = AUTOCOMPLETE_MAX_REMOTE_NAMES):
+        self.max_remote_names = max_remote_names
+        self._catalog_keys: dict[str, _NameKeys] = {}
+        self._remote_names: OrderedDict[str, None] = OrderedDict()
+        self._remote_keys = _NameKeys()
+
+    def __len__(self) -> int:
+        return len(self._remote_names) + sum(
+            len(name_keys.name_keys) for name_keys in self._catalog_keys.values()
+        )
+
+    def set_catalog(self, source: str, elements: Iterable[SyntaxElement]) -> None:
+        self._catalog_keys[source] = _NameKeys.build(
+            {element.name for element in elements}
+        )
+
+    def add_elements(self, elements: Iterable[SyntaxElement]) -> None:
+        for element in elements:
+            if element.name in self._remote_names:
+                self._remote_names.move_to_end(element.name)
+            else:
+                self._remote_names[element.name] = None
+                self._remote_keys.add(element.name)
+        while len(self._remote_names) > self.max_remote_names:
+            evicted_name, _ = self._remote_names.popitem(last=False)
+            self._remote_keys.remove(evicted_name)
+
+    def complete(self, prefix: str, limit: int) -> list[str]:
+        casefolded_prefix = " ".join(prefix.casefold().split())
+        all_keys = (*self._catalog_keys.values(), self._remote_keys)
+        found: dict[str, None] = {}
+        for name_keys in all_keys:
+            _scan_prefix(name_keys.name_keys, casefolded_prefix, limit, found)
+        if casefolded_prefix != "":
+            for name_keys in all_keys:
+                _scan_prefix(name_keys.word_keys, casefolded_prefix, limit, found)
+        return list(found)
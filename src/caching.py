@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Generic, TypeVar, Hashable, Callable, Awaitable, Optional
+
+from scheduling import RequestPriority, prioritized
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class _CacheEntry(Generic[V]):
+    value: V
+    fresh_until: float
+    stale_until: float
+
+
+class TTLCache(Generic[K, V]):
+    def __init__(
+        self,
+        max_size: int,
+        ttl: timedelta,
+        stale_while_revalidate: timedelta = timedelta(),
+    ):
+        if max_size <= 0:
+            raise ValueError(f"'max_size' must be positive, but was {max_size}")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, _CacheEntry[V]] = OrderedDict()
+        self._revalidations: dict[K, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return self._lookup(key) is not None
+
+    def _lookup(self, key: K) -> Optional[_CacheEntry[V]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry.stale_until:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self._lookup(key)
+        if entry is None:
+            return default
+        return entry.value
+
+    def set(self, key: K, value: V) -> None:
+        now = time.monotonic()
+        fresh_until = now + self.ttl.total_seconds()
+        self._entries[key] = _CacheEntry(
+            value=value,
+            fresh_until=fresh_until,
+            stale_until=fresh_until + self.stale_while_revalidate.total_seconds(),
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _revalidate(self, key: K, loader: Callable[[], Awaitable[V]]) -> None:
+        if key in self._revalidations:
+            return
+
+        async def revalidate():
+            # noinspection PyBroadException
+            try:
+                # the stale value is already being served, so users are not waiting for this
+                with prioritized(RequestPriority.REFRESH):
+                    value = await loader()
+                self.set(key, value)
+            except Exception:
+                logging.warning(f"Failed to revalidate cache entry {key}", exc_info=True)
+            finally:
+                del self._revalidations[key]
+
+        self._revalidations[key] = asyncio.create_task(revalidate())
+
+    async def get_or_load(
+        self,
+        key: K,
+        loader: Callable[[], Awaitable[V]],
+        serve_expired_on: tuple[type[Exception], ...] = (),
+    ) -> V:
+        expired_entry = self._entries.get(key)
+        entry = self._lookup(key)
+        if entry is not None:
+            if time.monotonic() < entry.fresh_until:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._revalidate(key, loader)
+            return entry.value
+        self.misses += 1
+        try:
+            value = await loader()
+        except serve_expired_on:
+            if expired_entry is None:
+                raise
+            # kept around until the loader succeeds again
+            self._entries[key] = expired_entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self.stale_hits += 1
+            return expired_entry.value
+        self.set(key, value)
+        return value
@@ -0,0 +1,211 @@
+import asyncio
+import dataclasses
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Sequence, Callable, Awaitable, TYPE_CHECKING
+
+from constants import CATALOG_FOLLOW_INTERVAL
+from models import SyntaxElement
+from scheduling import RequestPriority, prioritized
+from search_index import SearchIndex
+
+if TYPE_CHECKING:
+    from snapshots import CatalogSnapshotFile
+
+
+@dataclass(frozen=True)
+class CatalogDownload:
+    elements: Sequence[SyntaxElement]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+@dataclass(frozen=True)
+class CatalogState:
+    search_index: SearchIndex
+    etag: Optional[str]
+    last_modified: Optional[str]
+    checked_at: datetime
+
+    @property
+    def elements(self) -> Sequence[SyntaxElement]:
+        return self.search_index.elements
+
+
+# receives the ETag and Last-Modified of the current state, returns None if the catalog is unchanged
+CatalogLoader = Callable[
+    [Optional[str], Optional[str]], Awaitable[Optional[CatalogDownload]]
+]
+
+
+class Catalog:
+    def __init__(
+        self,
+        name: str,
+        loader: CatalogLoader,
+        refresh_interval: timedelta,
+        snapshot_file: Optional["CatalogSnapshotFile"] = None,
+        follow_snapshot: bool = False,
+    ):
+        self.name = name
+        self.loader = loader
+        # followers take the catalog from a snapshot kept up to date by another process,
+        # and only download it themselves when there is no snapshot yet
+        self.follow_snapshot = follow_snapshot and snapshot_file is not None
+        if self.follow_snapshot:
+            refresh_interval = min(refresh_interval, CATALOG_FOLLOW_INTERVAL)
+        self.refresh_interval = refresh_interval
+        self.snapshot_file = snapshot_file
+        self.state: Optional[CatalogState] = None
+        self._snapshot_modified_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._scheduler_task: Optional[asyncio.Task] = None
+        self._listeners: list[Callable[[CatalogState], None]] = []
+
+    def add_listener(self, listener: Callable[[CatalogState], None]) -> None:
+        self._listeners.append(listener)
+        if self.state is not None:
+            listener(self.state)
+
+    def _swap_state(self, state: CatalogState) -> None:
+        self.state = state
+        for listener in self._listeners:
+            # noinspection PyBroadException
+            try:
+                listener(state)
+            except Exception:
+                logging.error(
+                    f"Failed to notify a listener of the {self.name} catalog",
+                    exc_info=True,
+                )
+
+    @property
+    def is_stale(self) -> bool:
+        return (
+            self.state is None
+            or datetime.now() - self.state.checked_at > self.refresh_interval
+        )
+
+    async def _follow_snapshot(self) -> bool:
+        modified_at = await asyncio.to_thread(self.snapshot_file.modified_at)
+        if modified_at is None:
+            return False
+        if modified_at != self._snapshot_modified_at:
+            # noinspection PyBroadException
+            try:
+                snapshot_state = await asyncio.to_thread(self.snapshot_file.load)
+            except Exception:
+                logging.warning(
+                    f"Failed to load the snapshot of the {self.name} catalog",
+                    exc_info=True,
+                )
+                return False
+            if snapshot_state is None:
+                return False
+            self._snapshot_modified_at = modified_at
+            self._swap_state(
+                dataclasses.replace(snapshot_state, checked_at=datetime.now())
+            )
+        elif self.state is None:
+            # the snapshot could not be loaded before, so the catalog has to be downloaded
+            return False
+        else:
+            self.state = dataclasses.replace(self.state, checked_at=datetime.now())
+        return True
+
+    async def _refresh(self) -> None:
+        if self.follow_snapshot and await self._follow_snapshot():
+            return
+        current_state = self.state
+        with prioritized(RequestPriority.REFRESH):
+            download = await self.loader(
+                current_state.etag if current_state is not None else None,
+                current_state.last_modified if current_state is not None else None,
+            )
+        if download is None:
+            if current_state is not None:
+                self.state = CatalogState(
+                    search_index=current_state.search_index,
+                    etag=current_state.etag,
+                    last_modified=current_state.last_modified,
+                    checked_at=datetime.now(),
+                )
+            return
+        search_index = await asyncio.to_thread(SearchIndex, download.elements)
+        self._swap_state(
+            CatalogState(
+                search_index=search_index,
+                etag=download.etag,
+                last_modified=download.last_modified,
+                checked_at=datetime.now(),
+            )
+        )
+        logging.info(f"Loaded {len(search_index)} elements into the {self.name} catalog")
+        await self.save_snapshot()
+
+    async def save_snapshot(self) -> None:
+        if self.snapshot_file is None or self.state is None:
+            return
+        # noinspection PyBroadException
+        try:
+            await asyncio.to_thread(self.snapshot_file.save, self.state)
+        except Exception:
+            logging.error(
+                f"Failed to save a snapshot of the {self.name} catalog",
+                exc_info=True,
+            )
+
+    async def load_snapshot(self) -> None:
+        if self.snapshot_file is None or self.state is not None:
+            return
+        # noinspection PyBroadException
+        try:
+            modified_at = await asyncio.to_thread(self.snapshot_file.modified_at)
+            snapshot_state = await asyncio.to_thread(self.snapshot_file.load)
+        except Exception:
+            logging.warning(
+                f"Failed to load the snapshot of the {self.name} catalog",
+                exc_info=True,
+            )
+            return
+        if snapshot_state is not None and self.state is None:
+            # only remembered once loaded, so that followers do not skip a snapshot they could not read
+            self._snapshot_modified_at = modified_at
+            self._swap_state(snapshot_state)
+
+    def _log_refresh_failure(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(
+                f"Failed to refresh the {self.name} catalog", exc_info=task.exception()
+            )
+
+    def refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._log_refresh_failure)
+        return self._refresh_task
+
+    async def get_state(self) -> CatalogState:
+        if self.state is None:
+            await asyncio.shield(self.refresh())
+        elif self.is_stale:
+            self.refresh()
+        return self.state
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.wait((self.refresh(),))
+            await asyncio.sleep(self.refresh_interval.total_seconds())
+
+    async def start(self) -> None:
+        await self.load_snapshot()
+        if self._scheduler_task is None:
+            self._scheduler_task = asyncio.create_task(self._refresh_periodically())
+
+    async def close(self) -> None:
+        for task in (self._scheduler_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._scheduler_task = None
+        self._refresh_task = None
@@ -0,0 +1,108 @@
+import time
+from collections import deque
+from datetime import timedelta
+from enum import Enum
+
+from constants import (
+    PROVIDER_DEADLINE,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_SLOW_CALL_DURATION,
+    CIRCUIT_BREAKER_OPEN_DURATION,
+    ADAPTIVE_TIMEOUT_MIN,
+    ADAPTIVE_TIMEOUT_PERCENTILE,
+    ADAPTIVE_TIMEOUT_MULTIPLIER,
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+    ADAPTIVE_TIMEOUT_WINDOW,
+)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        slow_call_duration: timedelta = CIRCUIT_BREAKER_SLOW_CALL_DURATION,
+        open_duration: timedelta = CIRCUIT_BREAKER_OPEN_DURATION,
+        min_timeout: timedelta = ADAPTIVE_TIMEOUT_MIN,
+        max_timeout: timedelta = PROVIDER_DEADLINE,
+    ):
+        self.failure_threshold = failure_threshold
+        self.slow_call_duration = slow_call_duration
+        self.open_duration = open_duration
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._state = CircuitState.CLOSED
+        self._latencies: deque[float] = deque(maxlen=ADAPTIVE_TIMEOUT_WINDOW)
+
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state is CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.open_duration.total_seconds()
+        ):
+            self._state = CircuitState.HALF_OPEN
+        return self._state
+
+    @property
+    def is_available(self) -> bool:
+        state = self.state
+        return state is CircuitState.CLOSED or (
+            state is CircuitState.HALF_OPEN and not self._probe_in_flight
+        )
+
+    def try_acquire(self) -> bool:
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return True
+        if state is CircuitState.HALF_OPEN and not self._probe_in_flight:
+            # only a single probe is let through until it either closes or reopens the circuit
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release(self) -> None:
+        self._probe_in_flight = False
+
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def record_success(self, latency: float) -> None:
+        self._latencies.append(latency)
+        if latency >= self.slow_call_duration.total_seconds():
+            self.record_failure()
+            return
+        self.consecutive_failures = 0
+        self._state = CircuitState.CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if (
+            self._state is CircuitState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            self._open()
+
+    def compute_timeout(self) -> timedelta:
+        if len(self._latencies) < ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+            return self.max_timeout
+        latencies = sorted(self._latencies)
+        index = min(
+            len(latencies) - 1, int(ADAPTIVE_TIMEOUT_PERCENTILE * len(latencies))
+        )
+        timeout = timedelta(seconds=latencies[index] * ADAPTIVE_TIMEOUT_MULTIPLIER)
+        return max(self.min_timeout, min(self.max_timeout, timeout))
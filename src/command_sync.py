@@ -0,0 +1,44 @@
+import asyncio
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+from discord import app_commands
+
+
+def compute_command_tree_hash(
+    tree: app_commands.CommandTree, application_id: Optional[int]
+) -> str:
+    payload = {
+        "application_id": application_id,
+        "commands": sorted(
+            (command.to_dict(tree) for command in tree.get_commands()),
+            key=lambda command: (command["type"], command["name"]),
+        ),
+    }
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+async def sync_command_tree_if_changed(
+    tree: app_commands.CommandTree, application_id: Optional[int], hash_path: Path
+) -> bool:
+    command_tree_hash = compute_command_tree_hash(tree, application_id)
+    # noinspection PyBroadException
+    try:
+        synced_hash = await asyncio.to_thread(hash_path.read_text)
+    except FileNotFoundError:
+        synced_hash = None
+    except Exception:
+        logging.warning(f"Failed to read {hash_path}", exc_info=True)
+        synced_hash = None
+    if synced_hash is not None and synced_hash.strip() == command_tree_hash:
+        logging.info("Command tree is unchanged, skipping the sync")
+        return False
+    await tree.sync()
+    await asyncio.to_thread(hash_path.write_text, command_tree_hash)
+    logging.info("Synced the changed command tree")
+    return True
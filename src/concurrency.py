@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Generic, TypeVar, Hashable, Callable, Awaitable, Optional
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # callers may all have given up on the call, which must not log "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight(Generic[K, V]):
+    def __init__(self):
+        self._calls: dict[K, asyncio.Task] = {}
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def start(self, key: K, function: Callable[[], Awaitable[V]]) -> asyncio.Task:
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(function())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+            call.add_done_callback(_retrieve_exception)
+        return call
+
+    async def run(self, key: K, function: Callable[[], Awaitable[V]]) -> V:
+        # shielded so that one caller giving up does not cancel the call for everyone else
+        return await asyncio.shield(self.start(key, function))
+
+
+class Debouncer:
+    def __init__(self, interval: timedelta, function: Callable[[], Awaitable[None]]):
+        self.interval = interval
+        self.function = function
+        self._last_run = float("-inf")
+        self._task: Optional[asyncio.Task] = None
+
+    def trigger(self) -> None:
+        # calls made while one is already scheduled are coalesced into it
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        delay = self._last_run + self.interval.total_seconds() - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._task = None
+        self._last_run = loop.time()
+        # noinspection PyBroadException
+        try:
+            await self.function()
+        except Exception:
+            logging.error("Debounced call failed", exc_info=True)
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -7,3 +7,62 @@ EMBED_FIELD_VALUE_MAX_LENGTH = 1024
 SELECT_OPTION_LABEL_MAX_LENGTH = 100
 ELEMENT_DESCRIPTION_MAX_LENGTH = 200
 USER_AGENT = "Skript Documentation Bot"
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = timedelta(seconds=60)
+UPSTREAM_RATE_LIMIT = 5
+UPSTREAM_RATE_LIMIT_BURST = 10
+UPSTREAM_MAX_CONCURRENT_REQUESTS = 8
+UPSTREAM_MAX_QUEUED_REQUESTS = 64
+UPSTREAM_INTERACTIVE_QUEUE_TIMEOUT = timedelta(seconds=5)
+UPSTREAM_PREFETCH_QUEUE_TIMEOUT = timedelta(seconds=15)
+UPSTREAM_REFRESH_QUEUE_TIMEOUT = timedelta(minutes=2)
+UPSTREAM_DEFAULT_RETRY_AFTER = timedelta(seconds=60)
+UPSTREAM_MAX_RETRY_AFTER = timedelta(minutes=15)
+SEARCH_LATENCY_BUDGET = timedelta(seconds=10)
+PROVIDER_DEADLINE = timedelta(seconds=8)
+SEARCH_CACHE_MAX_SIZE = 2048
+SEARCH_CACHE_TTL = timedelta(minutes=15)
+SEARCH_CACHE_STALE_WHILE_REVALIDATE = timedelta(hours=6)
+CATALOG_REFRESH_INTERVAL = timedelta(hours=1)
+EXAMPLES_CACHE_MAX_SIZE = 4096
+EXAMPLES_CACHE_TTL = timedelta(hours=6)
+EXAMPLE_PREFETCH_COUNT = 5
+RECENT_AUTHOR_MESSAGE_LIMIT = 25
+RECENT_AUTHOR_MAX_CHANNELS = 10000
+AUTOCOMPLETE_MAX_CHOICES = 25
+AUTOCOMPLETE_CHOICE_MAX_LENGTH = 100
+AUTOCOMPLETE_MAX_REMOTE_NAMES = 20000
+SKRIPTLANG_DOCS_URL = "https://docs.skriptlang.org/docs.json"
+SKRIPTHUB_API_URL = "https://skripthub.net/api/v1"
+SKUNITY_API_URL = "https://api.skunity.com/v1"
+MIRROR_REFRESH_INTERVAL = timedelta(hours=6)
+MIRROR_EXAMPLE_SYNC_CONCURRENCY = 4
+MIRROR_EXAMPLE_SYNC_BATCH_SIZE = 200
+FUZZY_MIN_EXACT_RESULTS = MAX_SELECT_OPTION_COUNT
+FUZZY_MAX_CANDIDATES = 100
+FUZZY_MAX_POSTING_LENGTH = 2000
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RESULT_COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250)
+METRICS_HOST = "127.0.0.1"
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_SLOW_CALL_DURATION = timedelta(seconds=5)
+CIRCUIT_BREAKER_OPEN_DURATION = timedelta(seconds=30)
+ADAPTIVE_TIMEOUT_MIN = timedelta(seconds=1)
+ADAPTIVE_TIMEOUT_PERCENTILE = 0.99
+ADAPTIVE_TIMEOUT_MULTIPLIER = 3
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = 20
+ADAPTIVE_TIMEOUT_WINDOW = 200
+EMBED_CACHE_MAX_SIZE = 4096
+RESULT_PAGE_SIZE = MAX_SELECT_OPTION_COUNT - 1
+STREAMED_EDIT_INTERVAL = timedelta(seconds=1)
+CATALOG_FOLLOW_INTERVAL = timedelta(minutes=5)
+SHARED_CACHE_PRUNE_INTERVAL = timedelta(minutes=10)
+SHARD_IDENTIFY_INTERVAL = timedelta(seconds=5)
+WORKER_RESTART_DELAY = timedelta(seconds=5)
+TINYDB_MIGRATION_POLL_INTERVAL = timedelta(seconds=1)
+WORKER_SHUTDOWN_TIMEOUT = timedelta(seconds=30)
+QUERY_STATS_MAX_QUERIES = 1000
+WARMUP_QUERY_COUNT = 20
+WARMUP_CONCURRENCY = 4
+WARMUP_TIMEOUT = timedelta(seconds=20)
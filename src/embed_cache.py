@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from typing import Optional
+
+import discord
+
+from constants import EMBED_CACHE_MAX_SIZE
+from models import SyntaxElement
+
+
+def _compute_content_version(element: SyntaxElement) -> int:
+    # everything the embed is rendered from, so refreshed catalogs and loaded examples yield a new version
+    return hash(
+        (
+            element.name,
+            element.description,
+            tuple(element.patterns) if element.patterns is not None else None,
+            tuple(element.examples) if element.examples is not None else None,
+            element.required_addon,
+            element.required_addon_version,
+            element.required_minecraft_version,
+            element.type,
+            (
+                tuple(element.required_plugins)
+                if element.required_plugins is not None
+                else None
+            ),
+            element.link,
+        )
+    )
+
+
+def _copy_payload(payload: dict) -> dict:
+    # Embed.from_dict keeps references to the nested fields and footer, which callers may modify
+    copied_payload = dict(payload)
+    if "fields" in copied_payload:
+        copied_payload["fields"] = [dict(field) for field in copied_payload["fields"]]
+    if "footer" in copied_payload:
+        copied_payload["footer"] = dict(copied_payload["footer"])
+    return copied_payload
+
+
+class EmbedCache:
+    def __init__(self, max_size: int = EMBED_CACHE_MAX_SIZE):
+        if max_size <= 0:
+            raise ValueError(f"'max_size' must be positive, but was {max_size}")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # provider specific id to the content version and rendered payload
+        self._entries: OrderedDict[str, tuple[int, dict]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, element: SyntaxElement) -> Optional[discord.Embed]:
+        key = element.provider_specific_id
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != _compute_content_version(element):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return discord.Embed.from_dict(_copy_payload(entry[1]))
+
+    def set(self, element: SyntaxElement, embed: discord.Embed) -> None:
+        key = element.provider_specific_id
+        self._entries[key] = (
+            _compute_content_version(element),
+            _copy_payload(embed.to_dict()),
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_provider(self, provider_name: str) -> None:
+        prefix = f"{provider_name}:"
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,34 @@
+import dataclasses
+import logging
+from typing import Optional
+
+from models import GuildConfig
+from storage import GuildConfigStorage
+
+
+class GuildConfigRepository:
+    def __init__(self, storage: GuildConfigStorage):
+        self.storage = storage
+        self._guild_configs: dict[int, Optional[GuildConfig]] = {}
+        self._loaded_all = False
+
+    async def load_all(self) -> None:
+        self._guild_configs = dict(await self.storage.load_all())
+        self._loaded_all = True
+        logging.info(f"Loaded {len(self._guild_configs)} guild configurations")
+
+    async def get(self, guild_id: int) -> GuildConfig:
+        if guild_id in self._guild_configs:
+            guild_config = self._guild_configs[guild_id]
+        elif self._loaded_all:
+            guild_config = None
+        else:
+            guild_config = await self.storage.load(guild_id)
+            self._guild_configs.setdefault(guild_id, guild_config)
+        if guild_config is None:
+            return GuildConfig(enforce_preferred_providers=None, preferred_providers=None)
+        return dataclasses.replace(guild_config)
+
+    async def set(self, guild_id: int, guild_config: GuildConfig) -> None:
+        await self.storage.save(guild_id, guild_config)
+        self._guild_configs[guild_id] = dataclasses.replace(guild_config)
@@ -0,0 +1,121 @@
+import asyncio
+import importlib.util
+import logging
+import time
+from datetime import timedelta
+from typing import Optional, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from constants import (
+    PROVIDER_TIMEOUT,
+    USER_AGENT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    UPSTREAM_DEFAULT_RETRY_AFTER,
+)
+from scheduling import RequestScheduler, parse_retry_after, request_timing
+
+
+def compute_conditional_headers(
+    etag: Optional[str], last_modified: Optional[str]
+) -> dict[str, str]:
+    headers = {}
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    if last_modified is not None:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+class HttpClientPool:
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: timedelta = HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = False,
+        scheduler_factory: Callable[[], RequestScheduler] = RequestScheduler,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry.total_seconds(),
+        )
+        if http2 and importlib.util.find_spec("h2") is None:
+            logging.warning(
+                "HTTP/2 was requested but the 'h2' package is not installed, falling back to HTTP/1.1"
+            )
+            http2 = False
+        self.http2 = http2
+        self.scheduler_factory = scheduler_factory
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self.schedulers: dict[str, RequestScheduler] = {}
+        self._closed = False
+
+    @staticmethod
+    def _compute_origin(url: str) -> str:
+        split_url = urlsplit(url)
+        return f"{split_url.scheme}://{split_url.netloc}".casefold()
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        origin = HttpClientPool._compute_origin(url)
+        client = self._clients.get(origin)
+        if client is None:
+            if self._closed:
+                raise RuntimeError("HttpClientPool has been closed")
+            client = httpx.AsyncClient(
+                headers={"User-Agent": USER_AGENT},
+                timeout=PROVIDER_TIMEOUT.total_seconds(),
+                limits=self.limits,
+                http2=self.http2,
+            )
+            self._clients[origin] = client
+        return client
+
+    def scheduler_for(self, url: str) -> RequestScheduler:
+        origin = HttpClientPool._compute_origin(url)
+        scheduler = self.schedulers.get(origin)
+        if scheduler is None:
+            scheduler = self.scheduler_factory()
+            self.schedulers[origin] = scheduler
+        return scheduler
+
+    async def get(
+        self, url: str, headers: Optional[dict[str, str]] = None, **kwargs
+    ) -> httpx.Response:
+        client = self.client_for(url)
+        scheduler = self.scheduler_for(url)
+        timing = request_timing.get()
+        queued_at = time.perf_counter()
+        async with scheduler.slot():
+            if timing is not None:
+                timing.queued_seconds += time.perf_counter() - queued_at
+            async with asyncio.timeout(timing.timeout if timing is not None else None):
+                response = await client.get(url, headers=headers, **kwargs)
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 429 or (
+                response.status_code == 503 and retry_after is not None
+            ):
+                if retry_after is None:
+                    retry_after = UPSTREAM_DEFAULT_RETRY_AFTER
+                logging.warning(
+                    f"{HttpClientPool._compute_origin(url)} is rate limiting requests, "
+                    f"pausing them for {retry_after}"
+                )
+                scheduler.block_for(retry_after)
+        return response
+
+    async def aclose(self) -> None:
+        self._closed = True
+        clients = tuple(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    async def __aenter__(self) -> "HttpClientPool":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
@@ -1,61 +1,333 @@
+import asyncio
 import logging
 import os
+import sys
+from datetime import timedelta
 from pathlib import Path
 from typing import Optional
 
 import discord
-from asynctinydb import TinyDB, Query
 from discord import app_commands
 
 from discord.ext import commands
 
 import utils
+from autocomplete import NameIndex
+from command_sync import sync_command_tree_if_changed
+from constants import (
+    AUTOCOMPLETE_MAX_CHOICES,
+    AUTOCOMPLETE_CHOICE_MAX_LENGTH,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    UPSTREAM_RATE_LIMIT,
+    UPSTREAM_RATE_LIMIT_BURST,
+    UPSTREAM_MAX_CONCURRENT_REQUESTS,
+    UPSTREAM_MAX_QUEUED_REQUESTS,
+    METRICS_HOST,
+    WARMUP_CONCURRENCY,
+    WARMUP_QUERY_COUNT,
+    WARMUP_TIMEOUT,
+    SKRIPTLANG_DOCS_URL,
+    SKRIPTHUB_API_URL,
+    SKUNITY_API_URL,
+)
+from guild_configs import GuildConfigRepository
+from http_clients import HttpClientPool
+from metrics import (
+    MetricsServer,
+    registry,
+    register_cache,
+    register_catalog,
+    register_http_clients,
+    autocomplete_names,
+    cache_requests,
+    cache_entries,
+    provider_available,
+    instrument_command,
+)
 from models import SearchOptions, GuildConfig
+from paging import SearchCursor
+from query_stats import QueryStats
+from recent_users import RecentAuthorTracker
+from scheduling import RequestScheduler, RequestPriority, prioritized
+from shared_cache import SharedSearchCache
+from storage import (
+    SQLiteDatabase,
+    SQLiteGuildConfigStorage,
+    TinyDBGuildConfigStorage,
+    migrate_tinydb_guild_configs,
+    wait_for_tinydb_migration,
+)
 from providers import (
     SkriptHubDocumentationProvider,
     SkUnityDocumentationProvider,
     SkriptLangDocumentationProvider,
     CombinedDocumentationProvider,
+    CachedDocumentationProvider,
+    GuardedDocumentationProvider,
+    MirroredDocumentationProvider,
 )
 from views import SearchView
+from workers import run_workers
+
+worker_count = utils.get_env_int("SKRIPT_WORKER_COUNT", 1)
+if worker_count > 1 and "SKRIPT_WORKER_INDEX" not in os.environ:
+    # this process only supervises the workers, which each run a range of the shards
+    discord.utils.setup_logging()
+    run_workers(
+        (sys.executable, *sys.argv),
+        utils.get_env_int("SKRIPT_SHARD_COUNT", worker_count),
+        worker_count,
+    )
+    sys.exit()
+# the first worker keeps the shared catalogs up to date and syncs the commands
+worker_index = utils.get_env_int("SKRIPT_WORKER_INDEX", 0)
+is_primary_worker = worker_index == 0
 
 intents = discord.Intents.default()
 intents.members = True
-bot = commands.Bot(command_prefix="/", description="Skript bot", intents=intents)
+shard_count = utils.get_env_int("SKRIPT_SHARD_COUNT", 0)
+bot = commands.AutoShardedBot(
+    command_prefix="/",
+    description="Skript bot",
+    intents=intents,
+    shard_count=shard_count if shard_count != 0 else None,
+    shard_ids=utils.get_env_int_list("SKRIPT_SHARD_IDS"),
+)
+recent_authors = RecentAuthorTracker(bot)
+
+data_path = Path(os.environ["SKRIPT_DATA_PATH"])
+
+http_clients = HttpClientPool(
+    max_connections=utils.get_env_int(
+        "SKRIPT_HTTP_MAX_CONNECTIONS", HTTP_MAX_CONNECTIONS
+    ),
+    max_keepalive_connections=utils.get_env_int(
+        "SKRIPT_HTTP_MAX_KEEPALIVE_CONNECTIONS", HTTP_MAX_KEEPALIVE_CONNECTIONS
+    ),
+    keepalive_expiry=timedelta(
+        seconds=utils.get_env_int(
+            "SKRIPT_HTTP_KEEPALIVE_EXPIRY_SECONDS",
+            int(HTTP_KEEPALIVE_EXPIRY.total_seconds()),
+        )
+    ),
+    http2=utils.get_env_bool("SKRIPT_HTTP2", False),
+    scheduler_factory=lambda: RequestScheduler(
+        rate=utils.get_env_int("SKRIPT_UPSTREAM_RATE_LIMIT", UPSTREAM_RATE_LIMIT),
+        burst=utils.get_env_int(
+            "SKRIPT_UPSTREAM_RATE_LIMIT_BURST", UPSTREAM_RATE_LIMIT_BURST
+        ),
+        max_concurrency=utils.get_env_int(
+            "SKRIPT_UPSTREAM_MAX_CONCURRENT_REQUESTS", UPSTREAM_MAX_CONCURRENT_REQUESTS
+        ),
+        max_queued=utils.get_env_int(
+            "SKRIPT_UPSTREAM_MAX_QUEUED_REQUESTS", UPSTREAM_MAX_QUEUED_REQUESTS
+        ),
+    ),
+)
+
+skripthub_provider = SkriptHubDocumentationProvider(
+    http_clients,
+    os.environ["SKRIPT_SKRIPTHUB_TOKEN"],
+    os.environ.get("SKRIPT_SKRIPTHUB_API_URL", SKRIPTHUB_API_URL),
+)
+skunity_provider = SkUnityDocumentationProvider(
+    http_clients,
+    os.environ["SKRIPT_SKUNITY_KEY"],
+    os.environ.get("SKRIPT_SKUNITY_API_URL", SKUNITY_API_URL),
+)
+if worker_count > 1:
+    # search results are shared between the workers so that each search only reaches the sites once
+    cache_database = SQLiteDatabase(data_path / "cache.sqlite3")
+else:
+    cache_database = None
+mirror_mode = utils.get_env_bool("SKRIPT_MIRROR_MODE", False)
+if mirror_mode:
+    remote_providers = (
+        MirroredDocumentationProvider(
+            skripthub_provider,
+            data_path / "skripthub-catalog.bin",
+            follow_snapshot=not is_primary_worker,
+        ),
+        MirroredDocumentationProvider(
+            skunity_provider,
+            data_path / "skunity-catalog.bin",
+            follow_snapshot=not is_primary_worker,
+        ),
+    )
+else:
+    remote_providers = tuple(
+        CachedDocumentationProvider(
+            GuardedDocumentationProvider(provider),
+            shared_cache=(
+                SharedSearchCache(cache_database, provider)
+                if cache_database is not None
+                else None
+            ),
+        )
+        for provider in (skripthub_provider, skunity_provider)
+    )
 
 providers = {
-    "skriptlang": SkriptLangDocumentationProvider(),
-    "skripthub": SkriptHubDocumentationProvider(os.environ["SKRIPT_SKRIPTHUB_TOKEN"]),
-    "skunity": SkUnityDocumentationProvider(os.environ["SKRIPT_SKUNITY_KEY"]),
+    "skriptlang": SkriptLangDocumentationProvider(
+        http_clients,
+        data_path / "skriptlang-catalog.bin",
+        os.environ.get("SKRIPT_SKRIPTLANG_DOCS_URL", SKRIPTLANG_DOCS_URL),
+        follow_snapshot=not is_primary_worker,
+    ),
+    "skripthub": remote_providers[0],
+    "skunity": remote_providers[1],
 }
 
-database_path = Path(os.environ["SKRIPT_DATA_PATH"]) / "data.json"
-database = TinyDB(str(database_path.resolve()))
-config_table = database.table("configurations")
+name_index = NameIndex()
+for provider in providers.values():
+    if isinstance(provider, CachedDocumentationProvider):
+        provider.result_listeners.append(name_index.add_elements)
+    else:
+        provider.catalog.add_listener(
+            lambda catalog_state, source=provider.name: name_index.set_catalog(
+                source, catalog_state.elements
+            )
+        )
+        provider.catalog.add_listener(
+            lambda _, source=provider.name: SearchView.embed_cache.invalidate_provider(
+                source
+            )
+        )
+
+for provider in (skripthub_provider, skunity_provider):
+    register_cache(f"{provider.name} examples", provider.examples_cache)
+for provider in providers.values():
+    if isinstance(provider, CachedDocumentationProvider):
+        register_cache(f"{provider.name} searches", provider.cache)
+    else:
+        register_catalog(provider.catalog)
+provider_available.add_callback(
+    lambda: (
+        ((provider.name,), int(provider.is_available)) for provider in providers.values()
+    )
+)
+cache_requests.add_callback(
+    lambda: (
+        (("embeds", "hit"), SearchView.embed_cache.hits),
+        (("embeds", "miss"), SearchView.embed_cache.misses),
+    )
+)
+cache_entries.add_callback(lambda: ((("embeds",), len(SearchView.embed_cache)),))
+autocomplete_names.add_callback(lambda: (((), len(name_index)),))
+register_http_clients(http_clients)
+
+metrics_port = utils.get_env_int("SKRIPT_METRICS_PORT", 0)
+if metrics_port != 0:
+    metrics_server = MetricsServer(
+        registry,
+        os.environ.get("SKRIPT_METRICS_HOST", METRICS_HOST),
+        metrics_port + worker_index,
+    )
+else:
+    metrics_server = None
+
+tinydb_path = data_path / "data.json"
+storage_backend = os.environ.get("SKRIPT_STORAGE_BACKEND", "sqlite").casefold()
+if storage_backend == "sqlite":
+    database = SQLiteDatabase(data_path / "data.sqlite3")
+    guild_config_storage = SQLiteGuildConfigStorage(database)
+elif storage_backend == "tinydb":
+    if worker_count > 1:
+        raise ValueError("The tinydb storage backend cannot be shared between workers")
+    database = None
+    guild_config_storage = TinyDBGuildConfigStorage(tinydb_path)
+else:
+    raise ValueError(f"Unknown storage backend {storage_backend}")
+guild_configs = GuildConfigRepository(guild_config_storage)
+query_stats = QueryStats(data_path / f"top-queries-{worker_index}.json")
+
+
+async def load_guild_configs():
+    if isinstance(guild_config_storage, SQLiteGuildConfigStorage):
+        if is_primary_worker:
+            await migrate_tinydb_guild_configs(tinydb_path, guild_config_storage)
+        else:
+            # loading before the migration finished would cache an empty table
+            await wait_for_tinydb_migration(tinydb_path, guild_config_storage)
+    await guild_configs.load_all()
+
+
+async def warm_up_searches():
+    await query_stats.load()
+    doc_provider = CombinedDocumentationProvider(providers.values())
+    semaphore = asyncio.Semaphore(WARMUP_CONCURRENCY)
+
+    async def warm_up_search(query: str):
+        async with semaphore:
+            with prioritized(RequestPriority.PREFETCH):
+                await doc_provider.perform_search(SearchOptions(query=query))
+
+    await asyncio.gather(
+        *(warm_up_search(query) for query in query_stats.top(WARMUP_QUERY_COUNT))
+    )
+
+
+async def start_providers():
+    await asyncio.gather(*(provider.start() for provider in providers.values()))
+    try:
+        # the bot still works without warm caches, so failures must not prevent it from starting
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                providers["skriptlang"].catalog.get_state(),
+                warm_up_searches(),
+                return_exceptions=True,
+            ),
+            WARMUP_TIMEOUT.total_seconds(),
+        )
+    except asyncio.TimeoutError:
+        logging.warning(f"Warming up did not finish within {WARMUP_TIMEOUT}")
+        return
+    for result in results:
+        if isinstance(result, Exception):
+            logging.error("Failed to warm up", exc_info=result)
+
+
+async def sync_command_tree():
+    # noinspection PyBroadException
+    try:
+        await sync_command_tree_if_changed(
+            bot.tree, bot.application_id, data_path / "command-tree.sha256"
+        )
+    except Exception:
+        logging.error("Failed to sync the command tree", exc_info=True)
+
+
+@bot.event
+async def setup_hook():
+    await asyncio.gather(
+        load_guild_configs(),
+        start_providers(),
+        *((sync_command_tree(),) if is_primary_worker else ()),
+    )
+    if metrics_server is not None:
+        await metrics_server.start()
+
+
+@bot.listen("on_message")
+async def record_recent_author(message: discord.Message):
+    recent_authors.record(message)
 
 
 @bot.event
 async def on_ready():
-    logging.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
-    await bot.tree.sync()
+    logging.info(
+        f"Logged in as {bot.user} (ID: {bot.user.id}) on shards {sorted(bot.shards)}"
+    )
 
 
 async def get_guild_config(guild_id: int) -> GuildConfig:
-    guild_config_records = await config_table.search(
-        Query().guild_id == guild_id, limit=1
-    )
-    if len(guild_config_records) == 0:
-        return GuildConfig(enforce_preferred_providers=None, preferred_providers=None)
-    # noinspection PyTypeChecker
-    raw_guild_config = guild_config_records[0]["config"]
-    return GuildConfig(**raw_guild_config)
+    return await guild_configs.get(guild_id)
 
 
 async def set_guild_config(guild_id: int, guild_config: GuildConfig) -> None:
-    await config_table.upsert(
-        {"guild_id": guild_id, "config": guild_config.__dict__},
-        Query().guild_id == guild_id,
-    )
+    await guild_configs.set(guild_id, guild_config)
 
 
 @bot.tree.command(
@@ -63,6 +335,7 @@ async def set_guild_config(guild_id: int, guild_config: GuildConfig) -> None:
     description="Displays the preferred documentation sources used for searches",
 )
 @app_commands.checks.has_permissions(administrator=True)
+@instrument_command("get-sources")
 async def handle_get_sources_command(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
     guild_config = await get_guild_config(interaction.guild_id)
@@ -85,6 +358,7 @@ async def handle_get_sources_command(interaction: discord.Interaction):
 )
 @app_commands.describe(sources="The sources to use seperated by commas")
 @app_commands.checks.has_permissions(administrator=True)
+@instrument_command("set-sources")
 async def handle_set_sources_command(interaction: discord.Interaction, sources: str):
     await interaction.response.defer(ephemeral=True)
 
@@ -120,6 +394,7 @@ async def handle_set_sources_command(interaction: discord.Interaction, sources:
 )
 @app_commands.describe(enforced="Whether to enforce the preferred sources")
 @app_commands.checks.has_permissions(administrator=True)
+@instrument_command("set-sources-enforced")
 async def handle_set_sources_enforce_command(
     interaction: discord.Interaction, enforced: bool
 ):
@@ -135,10 +410,12 @@ async def handle_set_sources_enforce_command(
 
 @bot.tree.command(name="docs", description="Searches Skript documentation")
 @app_commands.describe(query="The query to search for", reply_to="The user to reply to")
+@instrument_command("docs")
 async def handle_docs_command(
     interaction: discord.Interaction, query: str, reply_to: Optional[discord.Member]
 ):
     await interaction.response.defer(ephemeral=True)
+    query_stats.record(query)
 
     guild_config = await get_guild_config(interaction.guild_id)
     if guild_config.preferred_providers is not None:
@@ -149,33 +426,76 @@ async def handle_docs_command(
         available_providers = providers.values()
     doc_provider = CombinedDocumentationProvider(available_providers)
 
-    search_options = SearchOptions(query=query)
-    results = await doc_provider.perform_search(search_options)
-
-    if len(results) > 0:
-        await interaction.followup.send(
-            view=SearchView(
-                interaction,
-                results,
-                doc_provider.providers,
-                doc_provider.providers,
-                search_options,
-                guild_config,
-                await utils.try_to_get_recent_users(
-                    bot,
-                    interaction.channel,
-                    excluded_user_ids=(bot.user.id, interaction.user.id),
-                ),
-                reply_to.id if reply_to is not None else None,
-            ),
-            embed=await SearchView.generate_embed(results[0]),
-            ephemeral=True,
+    cursor = SearchCursor(doc_provider, SearchOptions(query=query))
+    recent_users = asyncio.create_task(
+        recent_authors.get_recent_users(
+            interaction.channel,
+            excluded_user_ids=(bot.user.id, interaction.user.id),
         )
-    else:
+    )
+    view = None
+    try:
+        # the first results are shown as soon as they arrive and later ones are merged into the view
+        async for results in cursor.stream_page(0):
+            if view is not None:
+                view.show_streamed_results(results)
+            elif len(results) > 0:
+                view = SearchView(
+                    interaction,
+                    cursor,
+                    0,
+                    results,
+                    doc_provider.providers,
+                    guild_config,
+                    await recent_users,
+                    reply_to.id if reply_to is not None else None,
+                )
+                await interaction.followup.send(
+                    view=view,
+                    embed=await SearchView.generate_embed(results[0]),
+                    ephemeral=True,
+                )
+    finally:
+        recent_users.cancel()
+
+    if view is None:
         await interaction.followup.send(
             f"No results found for {discord.utils.escape_markdown(query)}",
             ephemeral=True,
         )
 
 
-bot.run(os.environ["SKRIPT_DISCORD_TOKEN"])
+@handle_docs_command.autocomplete("query")
+async def autocomplete_docs_query(
+    interaction: discord.Interaction, current: str
+) -> list[app_commands.Choice[str]]:
+    return [
+        app_commands.Choice(
+            name=name[:AUTOCOMPLETE_CHOICE_MAX_LENGTH],
+            value=name[:AUTOCOMPLETE_CHOICE_MAX_LENGTH],
+        )
+        for name in name_index.complete(current, AUTOCOMPLETE_MAX_CHOICES)
+    ]
+
+
+async def run_bot():
+    async with http_clients, bot:
+        try:
+            await bot.start(os.environ["SKRIPT_DISCORD_TOKEN"])
+        finally:
+            await asyncio.gather(*(provider.close() for provider in providers.values()))
+            if metrics_server is not None:
+                await metrics_server.close()
+            await query_stats.save()
+            await guild_config_storage.close()
+            if database is not None:
+                await database.close()
+            if cache_database is not None:
+                await cache_database.close()
+
+
+discord.utils.setup_logging()
+try:
+    asyncio.run(run_bot())
+except KeyboardInterrupt:
+    pass
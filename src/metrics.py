@@ -0,0 +1,373 @@
+import asyncio
+import functools
+import logging
+import time
+from bisect import bisect_left
+from datetime import datetime
+from typing import Callable, Iterable, Optional, Sequence, Awaitable, TypeVar
+
+from caching import TTLCache
+from catalog import Catalog
+from constants import LATENCY_BUCKETS, RESULT_COUNT_BUCKETS
+from http_clients import HttpClientPool
+
+F = TypeVar("F", bound=Callable[..., Awaitable])
+
+# label values followed by the sample value
+Sample = tuple[tuple[str, ...], float]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str]) -> str:
+    if len(label_names) == 0:
+        return ""
+    labels = ",".join(
+        f'{name}="{_escape_label_value(str(value))}"'
+        for name, value in zip(label_names, label_values)
+    )
+    return f"{{{labels}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+
+    def _render_samples(self) -> Iterable[str]:
+        raise NotImplementedError()
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type}",
+            *self._render_samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        super().__init__(name, description, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def _render_samples(self) -> Iterable[str]:
+        for label_values, value in tuple(self._values.items()):
+            yield f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}"
+
+
+class _HistogramSeries:
+    def __init__(self, bucket_count: int):
+        self.bucket_counts = [0] * bucket_count
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = _HistogramSeries(
+                len(self.buckets) + 1
+            )
+        # counts are stored per bucket and only accumulated when rendering
+        series.bucket_counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def _render_samples(self) -> Iterable[str]:
+        bucket_label_names = (*self.label_names, "le")
+        for label_values, series in tuple(self._series.items()):
+            cumulative_count = 0
+            for upper_bound, bucket_count in zip(
+                (*self.buckets, float("inf")), series.bucket_counts
+            ):
+                cumulative_count += bucket_count
+                labels = _format_labels(
+                    bucket_label_names, (*label_values, _format_value(upper_bound))
+                )
+                yield f"{self.name}_bucket{labels} {cumulative_count}"
+            labels = _format_labels(self.label_names, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(series.sum)}"
+            yield f"{self.name}_count{labels} {series.count}"
+
+
+class CallbackMetric(Metric):
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        type: str,
+        label_names: Sequence[str] = (),
+    ):
+        super().__init__(name, description, label_names)
+        self.type = type
+        self._callbacks: list[Callable[[], Iterable[Sample]]] = []
+
+    def add_callback(self, callback: Callable[[], Iterable[Sample]]) -> None:
+        self._callbacks.append(callback)
+
+    def _render_samples(self) -> Iterable[str]:
+        for callback in self._callbacks:
+            # noinspection PyBroadException
+            try:
+                samples = tuple(callback())
+            except Exception:
+                logging.error(f"Failed to collect metric {self.name}", exc_info=True)
+                continue
+            for label_values, value in samples:
+                yield f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, description: str, label_names: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, description, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, description, label_names, buckets))
+
+    def gauge_callback(
+        self, name: str, description: str, label_names: Sequence[str] = ()
+    ) -> CallbackMetric:
+        return self._register(CallbackMetric(name, description, "gauge", label_names))
+
+    def counter_callback(
+        self, name: str, description: str, label_names: Sequence[str] = ()
+    ) -> CallbackMetric:
+        return self._register(
+            CallbackMetric(name, description, "counter", label_names)
+        )
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+provider_search_seconds = registry.histogram(
+    "skript_provider_search_seconds",
+    "Time taken by documentation providers to answer a search, including cache hits",
+    ("provider",),
+)
+provider_upstream_seconds = registry.histogram(
+    "skript_provider_upstream_seconds",
+    "Time taken by documentation sites to answer searches that missed the caches, "
+    "excluding time spent waiting for the rate limit",
+    ("provider",),
+)
+provider_searches = registry.counter(
+    "skript_provider_searches_total",
+    "Searches performed per documentation provider by outcome",
+    ("provider", "outcome"),
+)
+provider_result_counts = registry.histogram(
+    "skript_provider_results",
+    "Number of results returned by documentation providers",
+    ("provider",),
+    RESULT_COUNT_BUCKETS,
+)
+command_seconds = registry.histogram(
+    "skript_command_seconds",
+    "Time taken to handle commands and view interactions",
+    ("command",),
+)
+commands = registry.counter(
+    "skript_commands_total",
+    "Handled commands and view interactions by outcome",
+    ("command", "outcome"),
+)
+cache_requests = registry.counter_callback(
+    "skript_cache_requests_total",
+    "Cache lookups by cache and result",
+    ("cache", "result"),
+)
+cache_entries = registry.gauge_callback(
+    "skript_cache_entries",
+    "Number of entries held by caches",
+    ("cache",),
+)
+catalog_elements = registry.gauge_callback(
+    "skript_catalog_elements",
+    "Number of elements in the local catalogs and their search indices",
+    ("catalog",),
+)
+catalog_age_seconds = registry.gauge_callback(
+    "skript_catalog_age_seconds",
+    "Time since the local catalogs were last checked for changes",
+    ("catalog",),
+)
+provider_available = registry.gauge_callback(
+    "skript_provider_available",
+    "Whether a documentation provider is currently queried (1) or skipped by its circuit breaker (0)",
+    ("provider",),
+)
+upstream_queued_requests = registry.gauge_callback(
+    "skript_upstream_queued_requests",
+    "Requests waiting for the rate limit of a documentation host",
+    ("host",),
+)
+upstream_shed_requests = registry.counter_callback(
+    "skript_upstream_shed_requests_total",
+    "Requests to documentation hosts that were dropped instead of queued by priority",
+    ("host", "priority"),
+)
+autocomplete_names = registry.gauge_callback(
+    "skript_autocomplete_names",
+    "Number of names known to query autocompletion",
+)
+
+
+def register_cache(cache_name: str, cache: TTLCache) -> None:
+    cache_requests.add_callback(
+        lambda: (
+            ((cache_name, "hit"), cache.hits),
+            ((cache_name, "stale_hit"), cache.stale_hits),
+            ((cache_name, "miss"), cache.misses),
+        )
+    )
+    cache_entries.add_callback(lambda: (((cache_name,), len(cache)),))
+
+
+def register_catalog(catalog: Catalog) -> None:
+    def collect_elements() -> Iterable[Sample]:
+        if catalog.state is not None:
+            yield (catalog.name,), len(catalog.state.search_index)
+
+    def collect_age() -> Iterable[Sample]:
+        if catalog.state is not None:
+            age = datetime.now() - catalog.state.checked_at
+            yield (catalog.name,), age.total_seconds()
+
+    catalog_elements.add_callback(collect_elements)
+    catalog_age_seconds.add_callback(collect_age)
+
+
+def register_http_clients(http_clients: HttpClientPool) -> None:
+    def collect_queued() -> Iterable[Sample]:
+        for host, scheduler in tuple(http_clients.schedulers.items()):
+            yield (host,), scheduler.queued
+
+    def collect_shed() -> Iterable[Sample]:
+        for host, scheduler in tuple(http_clients.schedulers.items()):
+            for priority, count in scheduler.shed.items():
+                yield (host, priority.name.lower()), count
+
+    upstream_queued_requests.add_callback(collect_queued)
+    upstream_shed_requests.add_callback(collect_shed)
+
+
+def instrument_command(command: str) -> Callable[[F], F]:
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await function(*args, **kwargs)
+                outcome = "success"
+                return result
+            finally:
+                command_seconds.observe(time.perf_counter() - start_time, command)
+                commands.inc(command, outcome)
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsServer:
+    def __init__(self, metrics_registry: MetricsRegistry, host: str, port: int):
+        self.registry = metrics_registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = await reader.readline()
+            while await reader.readline() not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split(" ")
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1] == "/metrics":
+                status = "200 OK"
+                body = self.registry.render().encode()
+            else:
+                status = "404 Not Found"
+                body = b"Not Found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        logging.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
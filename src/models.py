@@ -1,6 +1,7 @@
+import sys
 from dataclasses import dataclass
 from enum import Enum
-from typing import Sequence, Optional, TYPE_CHECKING
+from typing import Sequence, Optional, TYPE_CHECKING, Iterable
 
 import discord
 
@@ -8,10 +9,25 @@ if TYPE_CHECKING:
     from providers import DocumentationProvider
 
 
-@dataclass
+def _intern(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return sys.intern(value)
+
+
+def _intern_all(values: Optional[Iterable[str]]) -> Optional[tuple[str, ...]]:
+    if values is None:
+        return None
+    return tuple(sys.intern(value) for value in values)
+
+
+@dataclass(frozen=True)
 class SearchOptions:
     query: str
 
+    def normalized(self) -> "SearchOptions":
+        return SearchOptions(query=" ".join(self.query.split()).casefold())
+
 
 class SyntaxType(Enum):
 
@@ -68,7 +84,7 @@ class SyntaxType(Enum):
             case _:
                 raise ValueError(f"Unimplemented SyntaxType {self.name}")
 
-@dataclass
+@dataclass(slots=True)
 class SyntaxElement:
     id: str
     provider: "DocumentationProvider"
@@ -86,6 +102,18 @@ class SyntaxElement:
     cancellable: Optional[bool]
     link: Optional[str]
 
+    def __post_init__(self):
+        # addons, versions, plugins and types repeat across thousands of elements of a catalog
+        self.required_addon = _intern(self.required_addon)
+        self.required_addon_version = _intern(self.required_addon_version)
+        self.required_minecraft_version = _intern(self.required_minecraft_version)
+        self.return_type = _intern(self.return_type)
+        self.required_plugins = _intern_all(self.required_plugins)
+        self.event_values = _intern_all(self.event_values)
+        self.patterns = tuple(self.patterns) if self.patterns is not None else None
+        if self.examples is not None:
+            self.examples = tuple(self.examples)
+
     @property
     def provider_specific_id(self) -> str:
         return f"{self.provider.name}:{self.id}"
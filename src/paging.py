@@ -0,0 +1,49 @@
+from typing import Sequence, Optional, AsyncIterator
+
+from constants import RESULT_PAGE_SIZE
+from models import SearchOptions, SyntaxElement
+from providers import CombinedDocumentationProvider
+
+
+class SearchCursor:
+    def __init__(
+        self,
+        provider: CombinedDocumentationProvider,
+        options: SearchOptions,
+        page_size: int = RESULT_PAGE_SIZE,
+        provider_results: Optional[dict[str, Sequence[SyntaxElement]]] = None,
+    ):
+        self.provider = provider
+        self.options = options
+        self.page_size = page_size
+        # results of each provider by name, which may be shared between cursors for the same options
+        self.provider_results = provider_results if provider_results is not None else {}
+        self.results: list[SyntaxElement] = []
+        self.exhausted = False
+
+    async def fetch_page(self, page: int) -> Sequence[SyntaxElement]:
+        results = []
+        async for results in self.stream_page(page):
+            pass
+        return results
+
+    async def stream_page(self, page: int) -> AsyncIterator[Sequence[SyntaxElement]]:
+        start = page * self.page_size
+        end = start + self.page_size
+        # one result past the page is needed to know whether there is a next page
+        if len(self.results) > end or self.exhausted:
+            yield self.results[start:end]
+            return
+        settled_providers = set()
+        async for results in self.provider.search_progressively(
+            self.options, end + 1, self.provider_results, settled_providers
+        ):
+            self.results = results
+            yield results[start:end]
+        # providers that did not answer within the latency budget are searched again for later pages
+        self.exhausted = len(self.results) <= end and len(settled_providers) == len(
+            self.provider.providers
+        )
+
+    def has_next_page(self, page: int) -> bool:
+        return len(self.results) > (page + 1) * self.page_size
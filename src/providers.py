@@ -1,14 +1,56 @@
+import asyncio
+import dataclasses
 import html
+import json
 import logging
+import time
 from abc import abstractmethod, ABCMeta
-from typing import Sequence, Optional
+from typing import Sequence, Optional, Callable, AsyncIterator
 from urllib.parse import quote_plus
-from datetime import datetime, timedelta
+from datetime import timedelta
+from pathlib import Path
 
 import httpx
 
-from constants import MAX_SELECT_OPTION_COUNT, PROVIDER_TIMEOUT, USER_AGENT
+from constants import (
+    MAX_SELECT_OPTION_COUNT,
+    SEARCH_LATENCY_BUDGET,
+    PROVIDER_DEADLINE,
+    SEARCH_CACHE_MAX_SIZE,
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_STALE_WHILE_REVALIDATE,
+    CATALOG_REFRESH_INTERVAL,
+    EXAMPLES_CACHE_MAX_SIZE,
+    EXAMPLES_CACHE_TTL,
+    EXAMPLE_PREFETCH_COUNT,
+    SKRIPTLANG_DOCS_URL,
+    SKRIPTHUB_API_URL,
+    SKUNITY_API_URL,
+    MIRROR_REFRESH_INTERVAL,
+    MIRROR_EXAMPLE_SYNC_CONCURRENCY,
+    MIRROR_EXAMPLE_SYNC_BATCH_SIZE,
+)
+from caching import TTLCache
+from catalog import Catalog, CatalogDownload, CatalogState
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from concurrency import SingleFlight
+from http_clients import HttpClientPool, compute_conditional_headers
+from metrics import (
+    provider_search_seconds,
+    provider_upstream_seconds,
+    provider_searches,
+    provider_result_counts,
+)
 from models import SearchOptions, SyntaxElement, SyntaxType
+from scheduling import (
+    RequestPriority,
+    RequestShedError,
+    RequestTiming,
+    prioritized,
+    timed_requests,
+)
+from shared_cache import SharedSearchCache
+from snapshots import CatalogSnapshotFile
 
 
 def _convert_addon_version(addon_version: Optional[str]) -> Optional[str]:
@@ -23,7 +65,6 @@ def _convert_addon_version(addon_version: Optional[str]) -> Optional[str]:
 
 
 class DocumentationProvider(metaclass=ABCMeta):
-    # TODO: caching!
     @property
     @abstractmethod
     def name(self) -> str:
@@ -41,12 +82,138 @@ class DocumentationProvider(metaclass=ABCMeta):
     async def prepare_element_for_display(self, element: SyntaxElement) -> None:
         pass
 
+    def prefetch_element_for_display(self, element: SyntaxElement) -> None:
+        pass
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @property
+    def is_available(self) -> bool:
+        return True
+
+
+def prefetch_elements_for_display(
+    elements: Sequence[SyntaxElement], count: int = EXAMPLE_PREFETCH_COUNT
+) -> None:
+    for element in elements[:count]:
+        element.provider.prefetch_element_for_display(element)
+
+
+class RemoteDocumentationProvider(DocumentationProvider):
+    def __init__(self, http_clients: HttpClientPool):
+        self.http_clients = http_clients
+        self.examples_cache: TTLCache[str, Sequence[str]] = TTLCache(
+            max_size=EXAMPLES_CACHE_MAX_SIZE, ttl=EXAMPLES_CACHE_TTL
+        )
+        self._example_fetches: SingleFlight[str, Sequence[str]] = SingleFlight()
+        # kept apart so that users never wait for a lower priority prefetch of the same examples
+        self._example_prefetches: SingleFlight[str, Sequence[str]] = SingleFlight()
+
+    @abstractmethod
+    async def _fetch_examples(self, element: SyntaxElement) -> Sequence[str]:
+        pass
+
+    @abstractmethod
+    async def download_catalog(
+        self, etag: Optional[str], last_modified: Optional[str]
+    ) -> Optional[CatalogDownload]:
+        pass
+
+    @abstractmethod
+    def _convert_element(self, element: dict) -> SyntaxElement:
+        pass
+
+    def _convert_catalog(self, raw_elements: Sequence[dict]) -> Sequence[SyntaxElement]:
+        elements = []
+        for raw_element in raw_elements:
+            # noinspection PyBroadException
+            try:
+                elements.append(self._convert_element(raw_element))
+            except Exception:
+                logging.warning(
+                    f"Skipping {self.name} element {raw_element.get('id')} that could not be converted",
+                    exc_info=True,
+                )
+        return elements
+
+    def _get_examples(
+        self, element: SyntaxElement, fetches: SingleFlight[str, Sequence[str]]
+    ) -> asyncio.Task:
+        async def fetch_examples() -> Sequence[str]:
+            examples = await self._fetch_examples(element)
+            self.examples_cache.set(element.provider_specific_id, examples)
+            return examples
+
+        return fetches.start(element.provider_specific_id, fetch_examples)
+
+    def _validate_element(self, element: SyntaxElement) -> None:
+        if element.provider.name != self.name:
+            raise ValueError(
+                f"'element' was provided by {element.provider.name}, but must be provided by {self.name}"
+            )
+
+    async def prepare_element_for_display(self, element: SyntaxElement) -> None:
+        self._validate_element(element)
+        if element.examples is None:
+            examples = self.examples_cache.get(element.provider_specific_id)
+            if examples is None:
+                try:
+                    examples = await asyncio.shield(
+                        self._get_examples(element, self._example_fetches)
+                    )
+                except RequestShedError:
+                    # the element is still shown with its patterns, the examples are fetched next time
+                    logging.warning(
+                        f"Skipped examples for {element.provider_specific_id} as {self.name} is busy"
+                    )
+                    return
+            element.examples = examples
+
+    def prefetch_element_for_display(self, element: SyntaxElement) -> None:
+        self._validate_element(element)
+        if (
+            element.examples is not None
+            or element.provider_specific_id in self.examples_cache
+            or element.provider_specific_id in self._example_fetches
+        ):
+            return
+
+        def log_prefetch_failure(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception() is not None:
+                logging.warning(
+                    f"Failed to prefetch examples for {element.provider_specific_id}",
+                    exc_info=task.exception(),
+                )
+
+        with prioritized(RequestPriority.PREFETCH):
+            task = self._get_examples(element, self._example_prefetches)
+        task.add_done_callback(log_prefetch_failure)
+
 
 class SkriptLangDocumentationProvider(DocumentationProvider):
 
-    def __init__(self):
-        self.all_elements = None
-        self.last_request_time = None
+    def __init__(
+        self,
+        http_clients: HttpClientPool,
+        snapshot_path: Optional[Path] = None,
+        docs_url: str = SKRIPTLANG_DOCS_URL,
+        follow_snapshot: bool = False,
+    ):
+        self.http_clients = http_clients
+        self.docs_url = docs_url
+        self.catalog = Catalog(
+            self.name,
+            self._download_catalog,
+            CATALOG_REFRESH_INTERVAL,
+            CatalogSnapshotFile(snapshot_path, self)
+            if snapshot_path is not None
+            else None,
+            follow_snapshot,
+        )
 
     @staticmethod
     def _compute_event_values(element: dict) -> Optional[Sequence[str]]:
@@ -79,53 +246,50 @@ class SkriptLangDocumentationProvider(DocumentationProvider):
             link=f"https://docs.skriptlang.org/docs.html?search=#{quote_plus(element['id'])}",
         )
 
-    
-    @staticmethod
-    def _compute_match_level(query: str, element: SyntaxElement) -> Optional[int]:
-        casefolded_query = query.casefold()
-        casefolded_element_name = element.name.casefold()
-        if casefolded_element_name == casefolded_query:
-            return 1
-        name_matches = casefolded_query in casefolded_element_name
-        description_matches = casefolded_query in element.description.casefold()
-        if name_matches and description_matches:
-            return 2
-        elif name_matches:
-            return 3
-        elif description_matches:
-            return 4
-        else:
-            return None
-            
-    async def _get_all_elements(self) -> Sequence[SyntaxElement]:
-        async with httpx.AsyncClient(timeout=PROVIDER_TIMEOUT.total_seconds()) as client:
-            response = await client.get("https://docs.skriptlang.org/docs.json")
-            response.raise_for_status()
-            response_body = response.json()
-            all_elements = []
-            for type, key in (
-                (SyntaxType.CONDITION, "conditions"),
-                (SyntaxType.EFFECT, "effects"),
-                (SyntaxType.EXPRESSION, "expressions"),
-                (SyntaxType.EVENT, "events"),
-                (SyntaxType.CLASSINFO, "classes"),
-                (SyntaxType.STRUCTURE, "structures"),
-                (SyntaxType.SECTION, "sections"),
-                (SyntaxType.FUNCTION, "functions"),
-            ):
-                all_elements += [
-                    self._convert_element(type, element)
-                    for element in response_body[key]
-                ]
+    def _convert_catalog(self, raw_catalog: bytes) -> Sequence[SyntaxElement]:
+        response_body = json.loads(raw_catalog)
+        all_elements = []
+        for type, key in (
+            (SyntaxType.CONDITION, "conditions"),
+            (SyntaxType.EFFECT, "effects"),
+            (SyntaxType.EXPRESSION, "expressions"),
+            (SyntaxType.EVENT, "events"),
+            (SyntaxType.CLASSINFO, "classes"),
+            (SyntaxType.STRUCTURE, "structures"),
+            (SyntaxType.SECTION, "sections"),
+            (SyntaxType.FUNCTION, "functions"),
+        ):
+            all_elements += [
+                self._convert_element(type, element)
+                for element in response_body[key]
+            ]
         return all_elements
-    
+
+    async def _download_catalog(
+        self, etag: Optional[str], last_modified: Optional[str]
+    ) -> Optional[CatalogDownload]:
+        response = await self.http_clients.get(
+            self.docs_url,
+            headers=compute_conditional_headers(etag, last_modified),
+        )
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            return None
+        response.raise_for_status()
+        return CatalogDownload(
+            elements=await asyncio.to_thread(self._convert_catalog, response.content),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
     async def perform_search(self, options: SearchOptions) -> Sequence[SyntaxElement]:
-        if self.all_elements is None or (datetime.now() - self.last_request_time) > timedelta(hours=1):
-            self.last_request_time = datetime.now()
-            self.all_elements = await self._get_all_elements()
-        matching_elements = [element for element in self.all_elements if SkriptLangDocumentationProvider._compute_match_level(options.query, element) is not None]
-        matching_elements.sort(key=lambda element: SkriptLangDocumentationProvider._compute_match_level(options.query, element))
-        return matching_elements
+        catalog_state = await self.catalog.get_state()
+        return catalog_state.search_index.search(options.query)
+
+    async def start(self) -> None:
+        await self.catalog.start()
+
+    async def close(self) -> None:
+        await self.catalog.close()
 
     async def prepare_element_for_display(self, element: SyntaxElement) -> None:
         if element.provider.name != self.name:
@@ -141,9 +305,13 @@ class SkriptLangDocumentationProvider(DocumentationProvider):
     def icon_url(self):
         return "https://docs.skriptlang.org/assets/icon.png"
 
-class SkriptHubDocumentationProvider(DocumentationProvider):
-    def __init__(self, token: str):
-        self.headers = (("Authorization", f"Token {token}"), ("User-Agent", USER_AGENT))
+class SkriptHubDocumentationProvider(RemoteDocumentationProvider):
+    def __init__(
+        self, http_clients: HttpClientPool, token: str, api_url: str = SKRIPTHUB_API_URL
+    ):
+        super().__init__(http_clients)
+        self.api_url = api_url.rstrip("/")
+        self.headers = {"Authorization": f"Token {token}"}
 
     @staticmethod
     def _compute_type(element: dict) -> SyntaxType:
@@ -185,33 +353,40 @@ class SkriptHubDocumentationProvider(DocumentationProvider):
         )
 
     async def perform_search(self, options: SearchOptions) -> Sequence[SyntaxElement]:
-        async with httpx.AsyncClient(
-            headers=self.headers, timeout=PROVIDER_TIMEOUT.total_seconds()
-        ) as client:
-            query_params = {"search": options.query}
-            response = await client.get(
-                "https://skripthub.net/api/v1/syntax/", params=query_params
-            )
-            response.raise_for_status()
-            return tuple(self._convert_element(element) for element in response.json())
+        query_params = {"search": options.query}
+        response = await self.http_clients.get(
+            f"{self.api_url}/syntax/",
+            headers=self.headers,
+            params=query_params,
+        )
+        response.raise_for_status()
+        return tuple(self._convert_element(element) for element in response.json())
+
+    async def download_catalog(
+        self, etag: Optional[str], last_modified: Optional[str]
+    ) -> Optional[CatalogDownload]:
+        response = await self.http_clients.get(
+            f"{self.api_url}/syntax/",
+            headers={**self.headers, **compute_conditional_headers(etag, last_modified)},
+        )
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            return None
+        response.raise_for_status()
+        return CatalogDownload(
+            elements=await asyncio.to_thread(self._convert_catalog, response.json()),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
 
-    async def prepare_element_for_display(self, element: SyntaxElement) -> None:
-        if element.provider.name != self.name:
-            raise ValueError(
-                f"'element' was provided by {element.provider.name}, but must be provided by {self.name}"
-            )
-        if element.examples is None:
-            async with httpx.AsyncClient(
-                headers=self.headers, timeout=PROVIDER_TIMEOUT.total_seconds()
-            ) as client:
-                query_params = {"syntax": element.id}
-                response = await client.get(
-                    "https://skripthub.net/api/v1/syntaxexample/", params=query_params
-                )
-                response.raise_for_status()
-                element.examples = tuple(
-                    example["example_code"] for example in response.json()
-                )
+    async def _fetch_examples(self, element: SyntaxElement) -> Sequence[str]:
+        query_params = {"syntax": element.id}
+        response = await self.http_clients.get(
+            f"{self.api_url}/syntaxexample/",
+            headers=self.headers,
+            params=query_params,
+        )
+        response.raise_for_status()
+        return tuple(example["example_code"] for example in response.json())
 
     @property
     def name(self):
@@ -222,10 +397,13 @@ class SkriptHubDocumentationProvider(DocumentationProvider):
         return "https://i.imgur.com/YkzJ97l.png"
 
 
-class SkUnityDocumentationProvider(DocumentationProvider):
-    def __init__(self, key: str):
+class SkUnityDocumentationProvider(RemoteDocumentationProvider):
+    def __init__(
+        self, http_clients: HttpClientPool, key: str, api_url: str = SKUNITY_API_URL
+    ):
+        super().__init__(http_clients)
         self.key = key
-        self.headers = (("User-Agent", USER_AGENT),)
+        self.api_url = api_url.rstrip("/")
 
     @staticmethod
     def _compute_type(element: dict) -> SyntaxType:
@@ -263,65 +441,518 @@ class SkUnityDocumentationProvider(DocumentationProvider):
         )
 
     async def perform_search(self, options: SearchOptions) -> Sequence[SyntaxElement]:
-        async with httpx.AsyncClient(headers=self.headers, timeout=PROVIDER_TIMEOUT.total_seconds()) as client:
-            response = await client.get(
-                f"https://api.skunity.com/v1/{quote_plus(self.key)}/docs/search/{quote_plus(options.query)}"
+        response = await self.http_clients.get(
+            f"{self.api_url}/{quote_plus(self.key)}/docs/search/{quote_plus(options.query)}"
+        )
+        response.raise_for_status()
+        response_body = response.json()
+        elements = response_body["result"]
+        return tuple(self._convert_element(element) for element in elements)
+
+    async def download_catalog(
+        self, etag: Optional[str], last_modified: Optional[str]
+    ) -> Optional[CatalogDownload]:
+        response = await self.http_clients.get(
+            f"{self.api_url}/{quote_plus(self.key)}/docs/getAllSyntax",
+            headers=compute_conditional_headers(etag, last_modified),
+        )
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            return None
+        response.raise_for_status()
+        raw_elements = response.json()["result"]
+        if isinstance(raw_elements, dict):
+            raw_elements = list(raw_elements.values())
+        return CatalogDownload(
+            elements=await asyncio.to_thread(self._convert_catalog, raw_elements),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+    async def _fetch_examples(self, element: SyntaxElement) -> Sequence[str]:
+        response = await self.http_clients.get(
+            f"{self.api_url}/{quote_plus(self.key)}/docs/getExamplesByID/{quote_plus(element.id)}"
+        )
+        response.raise_for_status()
+        example_response = response.json()["result"]
+        if isinstance(example_response, list):
+            return tuple()
+        return tuple(
+            html.unescape(example_object["example"])
+            for example_object in example_response.values() if isinstance(example_object, dict) and example_object.get("example")
+        )
+
+    @property
+    def name(self):
+        return "skUnity"
+
+    @property
+    def icon_url(self):
+        return "https://i.imgur.com/Ci6jjhv.png"
+
+
+class MirroredDocumentationProvider(DocumentationProvider):
+    def __init__(
+        self,
+        provider: RemoteDocumentationProvider,
+        snapshot_path: Optional[Path] = None,
+        refresh_interval: timedelta = MIRROR_REFRESH_INTERVAL,
+        follow_snapshot: bool = False,
+    ):
+        self.provider = provider
+        self.catalog = Catalog(
+            provider.name,
+            self._download_catalog,
+            refresh_interval,
+            CatalogSnapshotFile(snapshot_path, provider)
+            if snapshot_path is not None
+            else None,
+            follow_snapshot,
+        )
+        self.catalog.add_listener(self._start_example_sync)
+        self._example_sync: Optional[asyncio.Task] = None
+
+    async def _download_catalog(
+        self, etag: Optional[str], last_modified: Optional[str]
+    ) -> Optional[CatalogDownload]:
+        download = await self.provider.download_catalog(etag, last_modified)
+        current_state = self.catalog.state
+        if download is None and current_state is not None:
+            # an unchanged catalog does not notify the listeners, but examples that failed to sync
+            # should still be retried
+            if self._example_sync is None or self._example_sync.done():
+                self._start_example_sync(current_state)
+        if download is None or current_state is None:
+            return download
+        # keep the examples of elements that have not changed, so only new or changed elements are synced again
+        current_elements = {element.id: element for element in current_state.elements}
+        for element in download.elements:
+            current_element = current_elements.get(element.id)
+            if (
+                current_element is not None
+                and current_element.examples is not None
+                and dataclasses.replace(element, examples=current_element.examples)
+                == current_element
+            ):
+                element.examples = current_element.examples
+        return download
+
+    async def _sync_examples(self, elements: Sequence[SyntaxElement]) -> None:
+        missing_elements = [element for element in elements if element.examples is None]
+        if len(missing_elements) == 0:
+            return
+        semaphore = asyncio.Semaphore(MIRROR_EXAMPLE_SYNC_CONCURRENCY)
+        shed = False
+
+        async def sync_element_examples(element: SyntaxElement) -> None:
+            nonlocal shed
+            async with semaphore:
+                if shed:
+                    return
+                # noinspection PyBroadException
+                try:
+                    with prioritized(RequestPriority.REFRESH):
+                        # bypasses the examples cache, which should keep what users are looking at
+                        # noinspection PyProtectedMember
+                        element.examples = await self.provider._fetch_examples(element)
+                except RequestShedError:
+                    shed = True
+                except Exception:
+                    logging.warning(
+                        f"Failed to sync examples for {element.provider_specific_id}",
+                        exc_info=True,
+                    )
+
+        for start in range(0, len(missing_elements), MIRROR_EXAMPLE_SYNC_BATCH_SIZE):
+            batch = missing_elements[start : start + MIRROR_EXAMPLE_SYNC_BATCH_SIZE]
+            await asyncio.gather(*(sync_element_examples(element) for element in batch))
+            # saved after every batch so that a restart does not lose the progress of a long sync
+            await self.catalog.save_snapshot()
+            if shed:
+                logging.warning(
+                    f"Paused syncing {self.name} examples until the next refresh as the site is busy"
+                )
+                return
+            logging.info(
+                f"Synced examples for {start + len(batch)}/{len(missing_elements)} {self.name} elements"
             )
-            response.raise_for_status()
-            response_body = response.json()
-            elements = response_body["result"]
-            return tuple(self._convert_element(element) for element in elements)
+
+    def _start_example_sync(self, catalog_state: CatalogState) -> None:
+        if self.catalog.follow_snapshot:
+            # the process maintaining the snapshot syncs the examples and saves them into it
+            return
+        if self._example_sync is not None:
+            self._example_sync.cancel()
+        self._example_sync = asyncio.create_task(
+            self._sync_examples(catalog_state.elements)
+        )
+
+    async def perform_search(self, options: SearchOptions) -> Sequence[SyntaxElement]:
+        if self.catalog.state is None:
+            self.catalog.refresh()
+            return await self.provider.perform_search(options)
+        catalog_state = await self.catalog.get_state()
+        return catalog_state.search_index.search(options.query)
 
     async def prepare_element_for_display(self, element: SyntaxElement) -> None:
-        if element.provider.name != self.name:
-            raise ValueError(
-                f"'element' was provided by {element.provider.name}, but must be provided by {self.name}"
+        await self.provider.prepare_element_for_display(element)
+
+    def prefetch_element_for_display(self, element: SyntaxElement) -> None:
+        self.provider.prefetch_element_for_display(element)
+
+    async def start(self) -> None:
+        await self.provider.start()
+        await self.catalog.start()
+
+    async def close(self) -> None:
+        if self._example_sync is not None:
+            self._example_sync.cancel()
+        await self.catalog.close()
+        await self.provider.close()
+
+    @property
+    def name(self):
+        return self.provider.name
+
+    @property
+    def icon_url(self):
+        return self.provider.icon_url
+
+
+class GuardedDocumentationProvider(DocumentationProvider):
+    def __init__(
+        self, provider: DocumentationProvider, breaker: Optional[CircuitBreaker] = None
+    ):
+        self.provider = provider
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    async def perform_search(self, options: SearchOptions) -> Sequence[SyntaxElement]:
+        if not self.breaker.try_acquire():
+            raise CircuitOpenError(f"Provider {self.name} is temporarily skipped")
+        start_time = time.perf_counter()
+        timing = None
+        try:
+            with timed_requests(self.breaker.compute_timeout().total_seconds()) as timing:
+                results = await self.provider.perform_search(options)
+        except (asyncio.CancelledError, RequestShedError):
+            # the caller no longer needs the results or never reached the provider,
+            # which says nothing about the provider
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            self._observe_latency(start_time, timing)
+            raise
+        self.breaker.record_success(self._observe_latency(start_time, timing))
+        return results
+
+    def _observe_latency(self, start_time: float, timing: Optional[RequestTiming]) -> float:
+        # measured here rather than in CombinedDocumentationProvider so that cache hits and
+        # waiting for the rate limit do not hide how fast the site itself answers
+        latency = time.perf_counter() - start_time
+        if timing is not None:
+            latency -= timing.queued_seconds
+        provider_upstream_seconds.observe(latency, self.name)
+        return latency
+
+    async def prepare_element_for_display(self, element: SyntaxElement) -> None:
+        await self.provider.prepare_element_for_display(element)
+
+    def prefetch_element_for_display(self, element: SyntaxElement) -> None:
+        self.provider.prefetch_element_for_display(element)
+
+    async def start(self) -> None:
+        await self.provider.start()
+
+    async def close(self) -> None:
+        await self.provider.close()
+
+    @property
+    def is_available(self) -> bool:
+        return self.breaker.is_available and self.provider.is_available
+
+    @property
+    def name(self):
+        return self.provider.name
+
+    @property
+    def icon_url(self):
+        return self.provider.icon_url
+
+
+class CachedDocumentationProvider(DocumentationProvider):
+    def __init__(
+        self,
+        provider: DocumentationProvider,
+        cache: Optional[TTLCache[SearchOptions, Sequence[SyntaxElement]]] = None,
+        shared_cache: Optional[SharedSearchCache] = None,
+    ):
+        self.provider = provider
+        self.shared_cache = shared_cache
+        if cache is None:
+            cache = TTLCache(
+                max_size=SEARCH_CACHE_MAX_SIZE,
+                ttl=SEARCH_CACHE_TTL,
+                stale_while_revalidate=SEARCH_CACHE_STALE_WHILE_REVALIDATE,
             )
-        if element.examples is None:
-            async with httpx.AsyncClient(headers=self.headers, timeout=PROVIDER_TIMEOUT.total_seconds()) as client:
-                response = await client.get(
-                    f"https://api.skunity.com/v1/{quote_plus(self.key)}/docs/getExamplesByID/{quote_plus(element.id)}"
-                )
-                response.raise_for_status()
-                example_response = response.json()["result"]
-                if isinstance(example_response, list):
-                    return
-                element.examples = tuple(
-                    html.unescape(example_object["example"])
-                    for example_object in example_response.values() if isinstance(example_object, dict) and example_object.get("example")
-                )
+        self.cache = cache
+        self.result_listeners: list[Callable[[Sequence[SyntaxElement]], None]] = []
+        self._searches: SingleFlight[SearchOptions, Sequence[SyntaxElement]] = (
+            SingleFlight()
+        )
+
+    async def _load_results(self, options: SearchOptions) -> Sequence[SyntaxElement]:
+        results = None
+        if self.shared_cache is not None:
+            results = await self.shared_cache.get(options)
+        if results is None:
+            try:
+                results = await self.provider.perform_search(options)
+            except RequestShedError:
+                if self.shared_cache is not None:
+                    results = await self.shared_cache.get(options, allow_expired=True)
+                if results is None:
+                    raise
+                return results
+            if self.shared_cache is not None:
+                await self.shared_cache.set(options, results)
+        for listener in self.result_listeners:
+            listener(results)
+        return results
+
+    async def perform_search(self, options: SearchOptions) -> Sequence[SyntaxElement]:
+        normalized_options = options.normalized()
+        return await self.cache.get_or_load(
+            normalized_options,
+            lambda: self._searches.run(
+                normalized_options, lambda: self._load_results(normalized_options)
+            ),
+            # outdated results are better than none when the site's rate limit is exhausted
+            serve_expired_on=(RequestShedError,),
+        )
+
+    async def prepare_element_for_display(self, element: SyntaxElement) -> None:
+        await self.provider.prepare_element_for_display(element)
+
+    def prefetch_element_for_display(self, element: SyntaxElement) -> None:
+        self.provider.prefetch_element_for_display(element)
+
+    async def start(self) -> None:
+        await self.provider.start()
+
+    async def close(self) -> None:
+        await self.provider.close()
+
+    @property
+    def is_available(self) -> bool:
+        return self.provider.is_available
 
     @property
     def name(self):
-        return "skUnity"
+        return self.provider.name
 
     @property
     def icon_url(self):
-        return "https://i.imgur.com/Ci6jjhv.png"
+        return self.provider.icon_url
 
 
 class CombinedDocumentationProvider(DocumentationProvider):
-    def __init__(self, providers: Sequence[DocumentationProvider]):
+    def __init__(
+        self,
+        providers: Sequence[DocumentationProvider],
+        latency_budget: timedelta = SEARCH_LATENCY_BUDGET,
+        provider_deadline: timedelta = PROVIDER_DEADLINE,
+    ):
         self.providers = list(providers)
+        self.latency_budget = latency_budget
+        self.provider_deadline = provider_deadline
 
-    async def perform_search(self, options: SearchOptions) -> Sequence[SyntaxElement]:
+    @staticmethod
+    def _merge_results(
+        results: Sequence[Optional[Sequence[SyntaxElement]]],
+        limit: int,
+    ) -> list[SyntaxElement]:
         discovered_elements = {}
         elements = []
-        for provider in self.providers:
-            if len(elements) >= MAX_SELECT_OPTION_COUNT:
+        for provider_results in results:
+            if len(elements) >= limit:
                 break
-            # noinspection PyBroadException
-            try:
-                results = await provider.perform_search(options)
-                for result in results:
-                    if result.detailed_name not in discovered_elements:
-                        discovered_elements[result.detailed_name] = True
-                        elements.append(result)
-            except Exception:
-                logging.error(
-                    f"Provider {provider.name} failed to provide results", exc_info=True
+            if provider_results is None:
+                continue
+            for result in provider_results:
+                if result.detailed_name not in discovered_elements:
+                    discovered_elements[result.detailed_name] = True
+                    elements.append(result)
+        return elements
+
+    @staticmethod
+    def _is_same_results(
+        results: Sequence[SyntaxElement], other_results: Sequence[SyntaxElement]
+    ) -> bool:
+        return (
+            len(results) == len(other_results)
+            and all(
+                result is other_result
+                for result, other_result in zip(results, other_results)
+            )
+        )
+
+    @staticmethod
+    def _has_guaranteed_results(
+        results: Sequence[Optional[Sequence[SyntaxElement]]],
+        settled: Sequence[bool],
+        limit: int,
+    ) -> bool:
+        settled_prefix_length = 0
+        while settled_prefix_length < len(settled) and settled[settled_prefix_length]:
+            settled_prefix_length += 1
+        merged_results = CombinedDocumentationProvider._merge_results(
+            results[:settled_prefix_length], limit
+        )
+        return len(merged_results) >= limit
+
+    async def _search_provider(
+        self, provider: DocumentationProvider, options: SearchOptions
+    ) -> Sequence[SyntaxElement]:
+        start_time = time.perf_counter()
+        outcome = "error"
+        try:
+            results = await asyncio.wait_for(
+                provider.perform_search(options),
+                self.provider_deadline.total_seconds(),
+            )
+            outcome = "success"
+            provider_result_counts.observe(len(results), provider.name)
+            return results
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise
+        except CircuitOpenError:
+            outcome = "skipped"
+            raise
+        except RequestShedError:
+            outcome = "shed"
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            provider_search_seconds.observe(
+                time.perf_counter() - start_time, provider.name
+            )
+            provider_searches.inc(provider.name, outcome)
+
+    async def perform_search(self, options: SearchOptions) -> Sequence[SyntaxElement]:
+        results = await self.search(options, MAX_SELECT_OPTION_COUNT)
+        return results[: MAX_SELECT_OPTION_COUNT - 1]
+
+    async def search(
+        self,
+        options: SearchOptions,
+        limit: int,
+        known_results: Optional[dict[str, Sequence[SyntaxElement]]] = None,
+    ) -> list[SyntaxElement]:
+        results = []
+        async for results in self.search_progressively(options, limit, known_results):
+            pass
+        return results
+
+    async def search_progressively(
+        self,
+        options: SearchOptions,
+        limit: int,
+        known_results: Optional[dict[str, Sequence[SyntaxElement]]] = None,
+        settled_providers: Optional[set[str]] = None,
+    ) -> AsyncIterator[list[SyntaxElement]]:
+        # yields the merged results of the providers that answered so far whenever another one answers,
+        # once the most preferred provider has answered so that its results are not reordered later,
+        # providers with known results are not searched again, and new results are added to known_results,
+        # the names of providers that answered, failed or were known are added to settled_providers
+        if known_results is None:
+            known_results = {}
+        if settled_providers is None:
+            settled_providers = set()
+        tasks = [
+            (
+                asyncio.create_task(self._search_provider(provider, options))
+                if provider.name not in known_results
+                else None
+            )
+            for provider in self.providers
+        ]
+        results: list[Optional[Sequence[SyntaxElement]]] = [
+            known_results.get(provider.name) for provider in self.providers
+        ]
+        settled = [task is None for task in tasks]
+        settled_providers.update(
+            provider.name for provider, task in zip(self.providers, tasks) if task is None
+        )
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.latency_budget.total_seconds()
+        pending = {task for task in tasks if task is not None}
+        yielded_results: Optional[list[SyntaxElement]] = None
+        try:
+            while len(pending) > 0:
+                remaining_budget = deadline - loop.time()
+                if remaining_budget <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=remaining_budget,
+                    return_when=asyncio.FIRST_COMPLETED,
                 )
-        return elements[: MAX_SELECT_OPTION_COUNT - 1]
+                for task in done:
+                    index = tasks.index(task)
+                    provider = self.providers[index]
+                    settled[index] = True
+                    settled_providers.add(provider.name)
+                    # noinspection PyBroadException
+                    try:
+                        results[index] = known_results[provider.name] = task.result()
+                    except asyncio.TimeoutError:
+                        logging.warning(
+                            f"Provider {provider.name} did not respond in time"
+                        )
+                    except CircuitOpenError:
+                        logging.debug(
+                            f"Skipped provider {provider.name} as it is failing"
+                        )
+                    except Exception:
+                        logging.error(
+                            f"Provider {provider.name} failed to provide results",
+                            exc_info=True,
+                        )
+                if CombinedDocumentationProvider._has_guaranteed_results(
+                    results, settled, limit
+                ):
+                    break
+                if len(pending) > 0 and settled[0]:
+                    merged_results = CombinedDocumentationProvider._merge_results(
+                        results, limit
+                    )[:limit]
+                    # timeouts, failures and answers without new results change nothing for the caller
+                    if not CombinedDocumentationProvider._is_same_results(
+                        merged_results, yielded_results or []
+                    ):
+                        yielded_results = merged_results
+                        yield merged_results
+        finally:
+            for task in pending:
+                task.cancel()
+        if not CombinedDocumentationProvider._has_guaranteed_results(
+            results, settled, limit
+        ):
+            for index, provider in enumerate(self.providers):
+                if not settled[index]:
+                    logging.warning(
+                        f"Provider {provider.name} did not respond within the search latency budget of {self.latency_budget}"
+                    )
+        merged_results = CombinedDocumentationProvider._merge_results(results, limit)[
+            :limit
+        ]
+        if yielded_results is None or not CombinedDocumentationProvider._is_same_results(
+            merged_results, yielded_results
+        ):
+            yield merged_results
 
     @property
     def name(self):
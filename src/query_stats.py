@@ -0,0 +1,46 @@
+import asyncio
+import json
+import logging
+from collections import Counter
+from pathlib import Path
+
+from constants import QUERY_STATS_MAX_QUERIES
+from models import SearchOptions
+
+
+class QueryStats:
+    def __init__(self, path: Path, max_queries: int = QUERY_STATS_MAX_QUERIES):
+        self.path = path
+        self.max_queries = max_queries
+        self.counts: Counter[str] = Counter()
+
+    def record(self, query: str) -> None:
+        normalized_query = SearchOptions(query=query).normalized().query
+        if normalized_query == "":
+            return
+        self.counts[normalized_query] += 1
+        if len(self.counts) > self.max_queries * 2:
+            # rare queries are dropped in bulk so that recording stays cheap
+            self.counts = Counter(dict(self.counts.most_common(self.max_queries)))
+
+    def top(self, count: int) -> list[str]:
+        return [query for query, _ in self.counts.most_common(count)]
+
+    async def load(self) -> None:
+        # noinspection PyBroadException
+        try:
+            counts = json.loads(await asyncio.to_thread(self.path.read_text))
+        except FileNotFoundError:
+            return
+        except Exception:
+            logging.warning(f"Failed to load query stats from {self.path}", exc_info=True)
+            return
+        self.counts.update(counts)
+
+    async def save(self) -> None:
+        counts = dict(self.counts.most_common(self.max_queries))
+        # noinspection PyBroadException
+        try:
+            await asyncio.to_thread(self.path.write_text, json.dumps(counts))
+        except Exception:
+            logging.error(f"Failed to save query stats to {self.path}", exc_info=True)
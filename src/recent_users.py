@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Sequence, Optional
+
+import discord
+from discord.abc import Messageable
+
+from concurrency import SingleFlight
+from constants import RECENT_AUTHOR_MESSAGE_LIMIT, RECENT_AUTHOR_MAX_CHANNELS
+
+
+class _ChannelAuthors:
+    def __init__(self, message_limit: int):
+        # (message id, author id) pairs, newest first
+        self.messages: deque[tuple[int, int]] = deque(maxlen=message_limit)
+        self.seeded = False
+
+    def author_ids(self) -> list[int]:
+        return list(dict.fromkeys(author_id for _, author_id in self.messages))
+
+
+class RecentAuthorTracker:
+    def __init__(
+        self,
+        bot: discord.Client,
+        message_limit: int = RECENT_AUTHOR_MESSAGE_LIMIT,
+        max_channels: int = RECENT_AUTHOR_MAX_CHANNELS,
+    ):
+        self.bot = bot
+        self.message_limit = message_limit
+        self.max_channels = max_channels
+        self._channels: OrderedDict[int, _ChannelAuthors] = OrderedDict()
+        self._seedings: SingleFlight[int, None] = SingleFlight()
+
+    def _get_channel_authors(self, channel_id: int) -> _ChannelAuthors:
+        channel_authors = self._channels.get(channel_id)
+        if channel_authors is None:
+            channel_authors = self._channels[channel_id] = _ChannelAuthors(
+                self.message_limit
+            )
+            while len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+        else:
+            self._channels.move_to_end(channel_id)
+        return channel_authors
+
+    def record(self, message: discord.Message) -> None:
+        if message.author.bot:
+            return
+        channel_authors = self._get_channel_authors(message.channel.id)
+        channel_authors.messages.appendleft((message.id, message.author.id))
+
+    async def _seed(self, channel: Messageable, channel_id: int) -> None:
+        try:
+            history = [
+                (message.id, message.author.id)
+                async for message in channel.history(limit=self.message_limit)
+                if not message.author.bot
+            ]
+        except discord.HTTPException:
+            history = []
+        channel_authors = self._get_channel_authors(channel_id)
+        recorded_message_ids = {message_id for message_id, _ in channel_authors.messages}
+        channel_authors.messages.extend(
+            message
+            for message in history
+            if message[0] not in recorded_message_ids
+        )
+        channel_authors.seeded = True
+
+    async def _ensure_seeded(self, channel: Messageable, channel_id: int) -> None:
+        channel_authors = self._channels.get(channel_id)
+        if channel_authors is not None and channel_authors.seeded:
+            return
+        await self._seedings.run(channel_id, lambda: self._seed(channel, channel_id))
+
+    async def _resolve_user(
+        self, guild: Optional[discord.Guild], user_id: int
+    ) -> Optional[discord.User | discord.Member]:
+        if guild is not None:
+            member = guild.get_member(user_id)
+            if member is not None:
+                return member
+            try:
+                return await guild.fetch_member(user_id)
+            except discord.HTTPException:
+                pass
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            return user
+        try:
+            return await self.bot.fetch_user(user_id)
+        except discord.HTTPException:
+            return None
+
+    async def get_recent_users(
+        self, channel: Messageable, excluded_user_ids: Sequence[int]
+    ) -> Sequence[discord.User | discord.Member]:
+        channel_id = getattr(channel, "id", None)
+        if channel_id is None:
+            return tuple()
+        await self._ensure_seeded(channel, channel_id)
+        author_ids = [
+            author_id
+            for author_id in self._get_channel_authors(channel_id).author_ids()
+            if author_id not in excluded_user_ids
+        ]
+        guild = getattr(channel, "guild", None)
+        users = await asyncio.gather(
+            *(self._resolve_user(guild, author_id) for author_id in author_ids),
+            return_exceptions=True,
+        )
+        # the reply picker is optional, so users that cannot be resolved are left out
+        resolved_users = []
+        for user in users:
+            if isinstance(user, Exception):
+                logging.warning("Failed to resolve a recent user", exc_info=user)
+            elif user is not None:
+                resolved_users.append(user)
+        return resolved_users
@@ -0,0 +1,228 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Optional, Iterator, AsyncIterator
+
+from constants import (
+    UPSTREAM_RATE_LIMIT,
+    UPSTREAM_RATE_LIMIT_BURST,
+    UPSTREAM_MAX_CONCURRENT_REQUESTS,
+    UPSTREAM_MAX_QUEUED_REQUESTS,
+    UPSTREAM_INTERACTIVE_QUEUE_TIMEOUT,
+    UPSTREAM_PREFETCH_QUEUE_TIMEOUT,
+    UPSTREAM_REFRESH_QUEUE_TIMEOUT,
+    UPSTREAM_MAX_RETRY_AFTER,
+)
+
+
+class RequestShedError(Exception):
+    pass
+
+
+class RequestPriority(IntEnum):
+    INTERACTIVE = 0
+    PREFETCH = 1
+    REFRESH = 2
+
+
+request_priority: ContextVar[RequestPriority] = ContextVar(
+    "request_priority", default=RequestPriority.INTERACTIVE
+)
+
+
+@dataclass
+class RequestTiming:
+    # applied to each request once it leaves the queue, so that waiting for the rate limit is not
+    # mistaken for a slow host
+    timeout: Optional[float]
+    queued_seconds: float = 0.0
+
+
+request_timing: ContextVar[Optional[RequestTiming]] = ContextVar(
+    "request_timing", default=None
+)
+
+
+@contextlib.contextmanager
+def timed_requests(timeout: Optional[float]) -> Iterator[RequestTiming]:
+    timing = RequestTiming(timeout)
+    token = request_timing.set(timing)
+    try:
+        yield timing
+    finally:
+        request_timing.reset(token)
+
+
+@contextlib.contextmanager
+def prioritized(priority: RequestPriority) -> Iterator[None]:
+    token = request_priority.set(priority)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[timedelta]:
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return timedelta(seconds=int(value))
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(retry_at - datetime.now(timezone.utc), timedelta())
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        if rate <= 0:
+            raise ValueError(f"'rate' must be positive, but was {rate}")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def delay(self, now: float) -> float:
+        self._refill(now)
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self._tokens -= 1
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        rate: float = UPSTREAM_RATE_LIMIT,
+        burst: int = UPSTREAM_RATE_LIMIT_BURST,
+        max_concurrency: int = UPSTREAM_MAX_CONCURRENT_REQUESTS,
+        max_queued: int = UPSTREAM_MAX_QUEUED_REQUESTS,
+        queue_timeouts: Optional[dict[RequestPriority, timedelta]] = None,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        if queue_timeouts is None:
+            queue_timeouts = {
+                RequestPriority.INTERACTIVE: UPSTREAM_INTERACTIVE_QUEUE_TIMEOUT,
+                RequestPriority.PREFETCH: UPSTREAM_PREFETCH_QUEUE_TIMEOUT,
+                RequestPriority.REFRESH: UPSTREAM_REFRESH_QUEUE_TIMEOUT,
+            }
+        self.queue_timeouts = queue_timeouts
+        self.shed: Counter[RequestPriority] = Counter()
+        self.active = 0
+        self._blocked_until = 0.0
+        # ordered by priority first and arrival second
+        self._waiters: list[tuple[RequestPriority, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    def _shed(self, priority: RequestPriority, reason: str) -> RequestShedError:
+        self.shed[priority] += 1
+        return RequestShedError(
+            f"Shed {priority.name.lower()} upstream request because {reason}"
+        )
+
+    def block_for(self, duration: timedelta) -> None:
+        duration = min(duration, UPSTREAM_MAX_RETRY_AFTER)
+        self._blocked_until = max(
+            self._blocked_until, time.monotonic() + duration.total_seconds()
+        )
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        wakeup_at = loop.time() + delay
+        if self._wakeup is not None:
+            if self._wakeup.when() <= wakeup_at:
+                return
+            self._wakeup.cancel()
+        self._wakeup = loop.call_at(wakeup_at, self._wake_up)
+
+    def _wake_up(self) -> None:
+        self._wakeup = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._waiters and self.active < self.max_concurrency:
+            waiter = self._waiters[0][2]
+            if waiter.done():
+                heapq.heappop(self._waiters)
+                continue
+            now = time.monotonic()
+            delay = max(self._blocked_until - now, self.bucket.delay(now))
+            if delay > 0:
+                self._schedule_wakeup(delay)
+                return
+            heapq.heappop(self._waiters)
+            self.bucket.take(now)
+            self.active += 1
+            waiter.set_result(None)
+
+    def _make_room(self, priority: RequestPriority) -> None:
+        pending = [entry for entry in self._waiters if not entry[2].done()]
+        if len(pending) < self.max_queued:
+            return
+        # the most recent request of the lowest priority gives way to more important work
+        lowest_priority, _, waiter = max(pending)
+        if lowest_priority <= priority:
+            raise self._shed(priority, "the queue is full")
+        waiter.set_exception(self._shed(lowest_priority, "the queue is full"))
+
+    async def acquire(self, priority: RequestPriority) -> None:
+        queue_timeout = self.queue_timeouts[priority].total_seconds()
+        blocked_for = self._blocked_until - time.monotonic()
+        if blocked_for > queue_timeout:
+            raise self._shed(
+                priority, f"the host asked to retry after {blocked_for:.0f}s"
+            )
+        self._make_room(priority)
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self._dispatch()
+        try:
+            async with asyncio.timeout(queue_timeout):
+                await waiter
+        except (TimeoutError, asyncio.CancelledError) as error:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # the slot was granted right before the caller gave up
+                self.release()
+            if isinstance(error, TimeoutError):
+                raise self._shed(
+                    priority, f"it was queued for over {queue_timeout:.0f}s"
+                ) from None
+            raise
+
+    def release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: Optional[RequestPriority] = None) -> AsyncIterator[None]:
+        await self.acquire(priority if priority is not None else request_priority.get())
+        try:
+            yield
+        finally:
+            self.release()
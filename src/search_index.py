@@ -0,0 +1,230 @@
+from array import array
+from collections import Counter
+from typing import Sequence, Optional, Iterable
+
+from constants import (
+    FUZZY_MIN_EXACT_RESULTS,
+    FUZZY_MAX_CANDIDATES,
+    FUZZY_MAX_POSTING_LENGTH,
+)
+from models import SyntaxElement
+
+NGRAM_LENGTH = 3
+FUZZY_MATCH_LEVEL = 5
+
+
+def _compute_ngrams(text: str) -> set[str]:
+    return {
+        text[index : index + NGRAM_LENGTH]
+        for index in range(len(text) - NGRAM_LENGTH + 1)
+    }
+
+
+def _build_postings(texts: Sequence[str]) -> dict[str, array]:
+    postings = {}
+    for element_index, text in enumerate(texts):
+        for ngram in _compute_ngrams(text):
+            element_indices = postings.get(ngram)
+            if element_indices is None:
+                element_indices = postings[ngram] = array("I")
+            element_indices.append(element_index)
+    return postings
+
+
+def _compute_max_edit_distance(query: str) -> int:
+    if len(query) <= 4:
+        return 1
+    elif len(query) <= 8:
+        return 2
+    return 3
+
+
+def _compute_substring_edit_distance(
+    query: str, text: str, max_distance: int
+) -> Optional[int]:
+    # edit distance between the query and its closest substring of the text
+    previous_row = [0] * (len(text) + 1)
+    for query_index, query_character in enumerate(query, 1):
+        current_row = [query_index]
+        for text_index, text_character in enumerate(text, 1):
+            current_row.append(
+                min(
+                    previous_row[text_index] + 1,
+                    current_row[text_index - 1] + 1,
+                    previous_row[text_index - 1] + (query_character != text_character),
+                )
+            )
+        if min(current_row) > max_distance:
+            return None
+        previous_row = current_row
+    distance = min(previous_row)
+    return distance if distance <= max_distance else None
+
+
+class SearchIndex:
+    def __init__(self, elements: Sequence[SyntaxElement]):
+        self.elements = elements
+        self.casefolded_names = [element.name.casefold() for element in elements]
+        self.casefolded_descriptions = [
+            element.description.casefold() for element in elements
+        ]
+        self.name_postings = _build_postings(self.casefolded_names)
+        self.description_postings = _build_postings(self.casefolded_descriptions)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def to_state(self) -> dict:
+        return {
+            "casefolded_names": tuple(self.casefolded_names),
+            "casefolded_descriptions": tuple(self.casefolded_descriptions),
+            "name_postings": {
+                ngram: element_indices.tobytes()
+                for ngram, element_indices in self.name_postings.items()
+            },
+            "description_postings": {
+                ngram: element_indices.tobytes()
+                for ngram, element_indices in self.description_postings.items()
+            },
+        }
+
+    @classmethod
+    def from_state(cls, elements: Sequence[SyntaxElement], state: dict) -> "SearchIndex":
+        search_index = cls.__new__(cls)
+        search_index.elements = elements
+        search_index.casefolded_names = list(state["casefolded_names"])
+        search_index.casefolded_descriptions = list(state["casefolded_descriptions"])
+        search_index.name_postings = {
+            ngram: array("I", element_indices)
+            for ngram, element_indices in state["name_postings"].items()
+        }
+        search_index.description_postings = {
+            ngram: array("I", element_indices)
+            for ngram, element_indices in state["description_postings"].items()
+        }
+        return search_index
+
+    @staticmethod
+    def _find_candidates(
+        postings: dict[str, array], query_ngrams: Iterable[str]
+    ) -> set[int]:
+        query_postings = []
+        for ngram in query_ngrams:
+            element_indices = postings.get(ngram)
+            if element_indices is None:
+                return set()
+            query_postings.append(element_indices)
+        query_postings.sort(key=len)
+        candidates = set(query_postings[0])
+        for element_indices in query_postings[1:]:
+            candidates.intersection_update(element_indices)
+            if len(candidates) == 0:
+                break
+        return candidates
+
+    def _compute_match_level(
+        self,
+        casefolded_query: str,
+        element_index: int,
+        name_matches: bool,
+        description_matches: bool,
+    ) -> Optional[int]:
+        if self.casefolded_names[element_index] == casefolded_query:
+            return 1
+        if name_matches and description_matches:
+            return 2
+        elif name_matches:
+            return 3
+        elif description_matches:
+            return 4
+        else:
+            return None
+
+    def _search_ranked(self, casefolded_query: str) -> list[tuple[int, int]]:
+        ranked_indices = []
+        if len(casefolded_query) < NGRAM_LENGTH:
+            for element_index in range(len(self.elements)):
+                match_level = self._compute_match_level(
+                    casefolded_query,
+                    element_index,
+                    casefolded_query in self.casefolded_names[element_index],
+                    casefolded_query in self.casefolded_descriptions[element_index],
+                )
+                if match_level is not None:
+                    ranked_indices.append((match_level, element_index))
+        else:
+            query_ngrams = _compute_ngrams(casefolded_query)
+            name_candidates = SearchIndex._find_candidates(
+                self.name_postings, query_ngrams
+            )
+            description_candidates = SearchIndex._find_candidates(
+                self.description_postings, query_ngrams
+            )
+            for element_index in name_candidates | description_candidates:
+                match_level = self._compute_match_level(
+                    casefolded_query,
+                    element_index,
+                    element_index in name_candidates
+                    and casefolded_query in self.casefolded_names[element_index],
+                    element_index in description_candidates
+                    and casefolded_query
+                    in self.casefolded_descriptions[element_index],
+                )
+                if match_level is not None:
+                    ranked_indices.append((match_level, element_index))
+        ranked_indices.sort()
+        return ranked_indices
+
+    def _search_fuzzy(
+        self, casefolded_query: str, excluded_indices: set[int]
+    ) -> list[tuple[int, int, int]]:
+        query_ngrams = _compute_ngrams(casefolded_query)
+        max_distance = _compute_max_edit_distance(casefolded_query)
+        shared_ngram_counts = Counter()
+        skipped_ngram_count = 0
+        for ngram in query_ngrams:
+            element_indices = self.name_postings.get(ngram, ())
+            if len(element_indices) > FUZZY_MAX_POSTING_LENGTH:
+                # too common to be selective, skipping it bounds the cost of a query
+                skipped_ngram_count += 1
+                continue
+            shared_ngram_counts.update(element_indices)
+        # every edit removes at most NGRAM_LENGTH of the query's n-grams from a match
+        min_shared_ngrams = max(
+            1,
+            len(query_ngrams) - skipped_ngram_count - NGRAM_LENGTH * max_distance,
+        )
+        fuzzy_matches = []
+        for element_index, shared_ngram_count in shared_ngram_counts.most_common(
+            FUZZY_MAX_CANDIDATES
+        ):
+            if shared_ngram_count < min_shared_ngrams:
+                break
+            if element_index in excluded_indices:
+                continue
+            distance = _compute_substring_edit_distance(
+                casefolded_query, self.casefolded_names[element_index], max_distance
+            )
+            if distance is not None:
+                fuzzy_matches.append(
+                    (distance, len(self.casefolded_names[element_index]), element_index)
+                )
+        fuzzy_matches.sort()
+        return fuzzy_matches
+
+    def search(self, query: str, fuzzy: bool = True) -> list[SyntaxElement]:
+        casefolded_query = query.casefold()
+        ranked_indices = self._search_ranked(casefolded_query)
+        if (
+            fuzzy
+            and len(ranked_indices) < FUZZY_MIN_EXACT_RESULTS
+            and len(casefolded_query) >= NGRAM_LENGTH
+        ):
+            ranked_indices += (
+                (FUZZY_MATCH_LEVEL, element_index)
+                for *_, element_index in self._search_fuzzy(
+                    casefolded_query,
+                    {element_index for _, element_index in ranked_indices},
+                )
+            )
+        return [self.elements[element_index] for _, element_index in ranked_indices]
@@ -0,0 +1,101 @@
+import logging
+import marshal
+import sqlite3
+import time
+import zlib
+from datetime import timedelta
+from typing import Optional, Sequence, TYPE_CHECKING
+
+from constants import SEARCH_CACHE_TTL, SHARED_CACHE_PRUNE_INTERVAL
+from models import SearchOptions, SyntaxElement
+from snapshots import serialize_element, deserialize_element
+from storage import SQLiteDatabase
+
+if TYPE_CHECKING:
+    from providers import DocumentationProvider
+
+
+class SharedSearchCache:
+    def __init__(
+        self,
+        database: SQLiteDatabase,
+        provider: "DocumentationProvider",
+        ttl: timedelta = SEARCH_CACHE_TTL,
+    ):
+        self.database = database
+        self.provider = provider
+        self.ttl = ttl
+        self._table_created = False
+        self._last_pruned_at = 0.0
+
+    def _ensure_table(self, connection: sqlite3.Connection) -> None:
+        if not self._table_created:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS search_results ("
+                "provider TEXT NOT NULL, query TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "results BLOB NOT NULL, PRIMARY KEY (provider, query))"
+            )
+            self._table_created = True
+
+    async def get(
+        self, options: SearchOptions, allow_expired: bool = False
+    ) -> Optional[Sequence[SyntaxElement]]:
+        def select(connection: sqlite3.Connection) -> Optional[bytes]:
+            self._ensure_table(connection)
+            row = connection.execute(
+                "SELECT results FROM search_results "
+                "WHERE provider = ? AND query = ? AND expires_at > ?",
+                (
+                    self.provider.name,
+                    options.query,
+                    float("-inf") if allow_expired else time.time(),
+                ),
+            ).fetchone()
+            return row[0] if row is not None else None
+
+        # noinspection PyBroadException
+        try:
+            payload = await self.database.run(select)
+            if payload is None:
+                return None
+            return tuple(
+                deserialize_element(values, self.provider)
+                for values in marshal.loads(zlib.decompress(payload))
+            )
+        except Exception:
+            logging.warning(
+                f"Failed to read {self.provider.name} results from the shared cache",
+                exc_info=True,
+            )
+            return None
+
+    async def set(self, options: SearchOptions, results: Sequence[SyntaxElement]) -> None:
+        payload = zlib.compress(
+            marshal.dumps(tuple(serialize_element(element) for element in results)), 1
+        )
+        now = time.time()
+        prune = now - self._last_pruned_at >= SHARED_CACHE_PRUNE_INTERVAL.total_seconds()
+
+        def upsert(connection: sqlite3.Connection) -> None:
+            self._ensure_table(connection)
+            connection.execute(
+                "INSERT INTO search_results (provider, query, expires_at, results) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(provider, query) DO UPDATE SET "
+                "expires_at = excluded.expires_at, results = excluded.results",
+                (self.provider.name, options.query, now + self.ttl.total_seconds(), payload),
+            )
+            if prune:
+                connection.execute(
+                    "DELETE FROM search_results WHERE expires_at <= ?", (now,)
+                )
+
+        if prune:
+            self._last_pruned_at = now
+        # noinspection PyBroadException
+        try:
+            await self.database.run(upsert)
+        except Exception:
+            logging.warning(
+                f"Failed to write {self.provider.name} results to the shared cache",
+                exc_info=True,
+            )
@@ -0,0 +1,111 @@
+import logging
+import marshal
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+
+from catalog import CatalogState
+from models import SyntaxElement, SyntaxType
+from search_index import SearchIndex
+
+if TYPE_CHECKING:
+    from providers import DocumentationProvider
+
+SNAPSHOT_MAGIC = b"SKDC"
+SNAPSHOT_FORMAT_VERSION = 1
+# format version, marshal version, posting item size
+SNAPSHOT_HEADER = struct.Struct("<4sHHB")
+
+_ELEMENT_FIELDS = tuple(
+    field.name for field in fields(SyntaxElement) if field.name != "provider"
+)
+
+
+def serialize_element(element: SyntaxElement) -> tuple:
+    values = []
+    for field_name in _ELEMENT_FIELDS:
+        value = getattr(element, field_name)
+        if isinstance(value, SyntaxType):
+            value = value.name
+        elif isinstance(value, (list, tuple)):
+            value = tuple(value)
+        values.append(value)
+    return tuple(values)
+
+
+def deserialize_element(
+    values: tuple, provider: "DocumentationProvider"
+) -> SyntaxElement:
+    element_fields = dict(zip(_ELEMENT_FIELDS, values))
+    element_fields["type"] = SyntaxType[element_fields["type"]]
+    return SyntaxElement(provider=provider, **element_fields)
+
+
+class CatalogSnapshotFile:
+    def __init__(self, path: Path, provider: "DocumentationProvider"):
+        self.path = path
+        self.provider = provider
+
+    def modified_at(self) -> Optional[float]:
+        try:
+            return self.path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def save(self, state: CatalogState) -> None:
+        payload = {
+            "etag": state.etag,
+            "last_modified": state.last_modified,
+            "checked_at": state.checked_at.timestamp(),
+            "elements": tuple(serialize_element(element) for element in state.elements),
+            "search_index": state.search_index.to_state(),
+        }
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_FORMAT_VERSION,
+            marshal.version,
+            array("I").itemsize,
+        )
+        temporary_path = self.path.with_name(
+            f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        temporary_path.write_bytes(header + zlib.compress(marshal.dumps(payload), 1))
+        os.replace(temporary_path, self.path)
+
+    def load(self) -> Optional[CatalogState]:
+        if not self.path.is_file():
+            return None
+        start_time = time.perf_counter()
+        snapshot = self.path.read_bytes()
+        magic, format_version, marshal_version, posting_item_size = (
+            SNAPSHOT_HEADER.unpack_from(snapshot)
+        )
+        if (
+            magic != SNAPSHOT_MAGIC
+            or format_version != SNAPSHOT_FORMAT_VERSION
+            or marshal_version != marshal.version
+            or posting_item_size != array("I").itemsize
+        ):
+            logging.info(f"Ignoring incompatible catalog snapshot {self.path}")
+            return None
+        payload = marshal.loads(zlib.decompress(snapshot[SNAPSHOT_HEADER.size :]))
+        elements = [
+            deserialize_element(values, self.provider) for values in payload["elements"]
+        ]
+        state = CatalogState(
+            search_index=SearchIndex.from_state(elements, payload["search_index"]),
+            etag=payload["etag"],
+            last_modified=payload["last_modified"],
+            checked_at=datetime.fromtimestamp(payload["checked_at"]),
+        )
+        logging.info(
+            f"Loaded {len(elements)} elements from {self.path} in {(time.perf_counter() - start_time) * 1000:.1f}ms"
+        )
+        return state
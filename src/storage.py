@@ -0,0 +1,210 @@
+import asyncio
+import json
+import logging
+import sqlite3
+from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Callable, TypeVar
+
+from asynctinydb import TinyDB, Query
+
+from constants import TINYDB_MIGRATION_POLL_INTERVAL
+from models import GuildConfig
+
+T = TypeVar("T")
+
+TINYDB_MIGRATION_KEY = "tinydb_migrated"
+
+
+class GuildConfigStorage(metaclass=ABCMeta):
+    @abstractmethod
+    async def load(self, guild_id: int) -> Optional[GuildConfig]:
+        pass
+
+    @abstractmethod
+    async def load_all(self) -> dict[int, GuildConfig]:
+        pass
+
+    @abstractmethod
+    async def save(self, guild_id: int, guild_config: GuildConfig) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class TinyDBGuildConfigStorage(GuildConfigStorage):
+    def __init__(self, path: Path):
+        self.database = TinyDB(str(path.resolve()))
+        self.table = self.database.table("configurations")
+
+    async def load(self, guild_id: int) -> Optional[GuildConfig]:
+        records = await self.table.search(Query().guild_id == guild_id, limit=1)
+        if len(records) == 0:
+            return None
+        # noinspection PyTypeChecker
+        return GuildConfig(**records[0]["config"])
+
+    async def load_all(self) -> dict[int, GuildConfig]:
+        records = await self.table.all()
+        # noinspection PyTypeChecker
+        return {
+            record["guild_id"]: GuildConfig(**record["config"]) for record in records
+        }
+
+    async def save(self, guild_id: int, guild_config: GuildConfig) -> None:
+        await self.table.upsert(
+            {"guild_id": guild_id, "config": guild_config.__dict__},
+            Query().guild_id == guild_id,
+        )
+
+    async def close(self) -> None:
+        await self.database.close()
+
+
+class SQLiteDatabase:
+    def __init__(self, path: Path):
+        self.path = path
+        # a single worker serializes every statement on the one connection
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite"
+        )
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(str(self.path), check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    async def run(self, operation: Callable[[sqlite3.Connection], T]) -> T:
+        def run_operation() -> T:
+            connection = self._connect()
+            with connection:
+                return operation(connection)
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, run_operation
+        )
+
+    async def get_metadata(self, key: str) -> Optional[str]:
+        def select(connection: sqlite3.Connection) -> Optional[str]:
+            row = connection.execute(
+                "SELECT value FROM metadata WHERE key = ?", (key,)
+            ).fetchone()
+            return row[0] if row is not None else None
+
+        return await self.run(select)
+
+    async def set_metadata(self, key: str, value: str) -> None:
+        await self.run(
+            lambda connection: connection.execute(
+                "INSERT INTO metadata (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+        )
+
+    async def close(self) -> None:
+        def close_connection() -> None:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, close_connection
+        )
+        self._executor.shutdown(wait=True)
+
+
+class SQLiteGuildConfigStorage(GuildConfigStorage):
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+        self._table_created = False
+
+    async def _run(self, operation: Callable[[sqlite3.Connection], T]) -> T:
+        def run_operation(connection: sqlite3.Connection) -> T:
+            if not self._table_created:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS guild_configs "
+                    "(guild_id INTEGER PRIMARY KEY, config TEXT NOT NULL)"
+                )
+                self._table_created = True
+            return operation(connection)
+
+        return await self.database.run(run_operation)
+
+    async def load(self, guild_id: int) -> Optional[GuildConfig]:
+        def select(connection: sqlite3.Connection) -> Optional[GuildConfig]:
+            row = connection.execute(
+                "SELECT config FROM guild_configs WHERE guild_id = ?", (guild_id,)
+            ).fetchone()
+            return GuildConfig(**json.loads(row[0])) if row is not None else None
+
+        return await self._run(select)
+
+    async def load_all(self) -> dict[int, GuildConfig]:
+        def select(connection: sqlite3.Connection) -> dict[int, GuildConfig]:
+            return {
+                guild_id: GuildConfig(**json.loads(config))
+                for guild_id, config in connection.execute(
+                    "SELECT guild_id, config FROM guild_configs"
+                )
+            }
+
+        return await self._run(select)
+
+    async def save(self, guild_id: int, guild_config: GuildConfig) -> None:
+        await self.save_all({guild_id: guild_config})
+
+    async def save_all(self, guild_configs: dict[int, GuildConfig]) -> None:
+        await self._run(
+            lambda connection: connection.executemany(
+                "INSERT INTO guild_configs (guild_id, config) VALUES (?, ?) "
+                "ON CONFLICT(guild_id) DO UPDATE SET config = excluded.config",
+                tuple(
+                    (guild_id, json.dumps(guild_config.__dict__))
+                    for guild_id, guild_config in guild_configs.items()
+                ),
+            )
+        )
+
+
+async def migrate_tinydb_guild_configs(
+    tinydb_path: Path, storage: SQLiteGuildConfigStorage
+) -> None:
+    if not tinydb_path.is_file():
+        return
+    if await storage.database.get_metadata(TINYDB_MIGRATION_KEY) is not None:
+        return
+    tinydb_storage = TinyDBGuildConfigStorage(tinydb_path)
+    try:
+        guild_configs = await tinydb_storage.load_all()
+    finally:
+        await tinydb_storage.close()
+    await storage.save_all(guild_configs)
+    await storage.database.set_metadata(TINYDB_MIGRATION_KEY, str(tinydb_path))
+    logging.info(
+        f"Migrated {len(guild_configs)} guild configurations from {tinydb_path}"
+    )
+
+
+async def wait_for_tinydb_migration(
+    tinydb_path: Path, storage: SQLiteGuildConfigStorage
+) -> None:
+    logged = False
+    while (
+        tinydb_path.is_file()
+        and await storage.database.get_metadata(TINYDB_MIGRATION_KEY) is None
+    ):
+        if not logged:
+            logging.info(f"Waiting for {tinydb_path} to be migrated by the primary worker")
+            logged = True
+        await asyncio.sleep(TINYDB_MIGRATION_POLL_INTERVAL.total_seconds())
@@ -1,8 +1,8 @@
-from typing import Sequence
+import os
+from typing import Sequence, Optional
 
 import discord
-from discord import User, Member
-from discord.abc import Messageable
+from discord import Member
 
 
 def escape_code_block_content(content: str) -> str:
@@ -27,37 +27,28 @@ def join_english_or(parts: Sequence[str]) -> str:
         return parts[0]
 
 
-async def try_to_get_recent_users(
-    bot: discord.Client,
-    channel: Messageable,
-    excluded_user_ids: Sequence[int],
-    message_limit: int = 25,
-) -> Sequence[User]:
-    async def convert_to_user(
-        message: discord.Message,
-    ) -> discord.User | discord.Member:
-        guild = message.guild
-        if guild is not None:
-            try:
-                fetched_member = await guild.fetch_member(message.author.id)
-                if fetched_member is not None:
-                    return fetched_member
-            except discord.errors.NotFound:
-                pass
-        return await bot.fetch_user(message.author.id)
-
-    try:
-        unique_authors = {
-            message.author.id: message
-            async for message in channel.history(limit=message_limit)
-            if message.author.id not in excluded_user_ids and not message.author.bot
-        }
-        return [await convert_to_user(message) for message in unique_authors.values()]
-    except discord.Forbidden:
-        return tuple()
-
-
 def get_appropriate_name(user: discord.User | discord.Member) -> str:
     if isinstance(user, Member):
         return user.display_name
     return user.mention
+
+
+def get_env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def get_env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().casefold() in ("1", "true", "yes", "on")
+
+
+def get_env_int_list(name: str) -> Optional[list[int]]:
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return None
+    return [int(part) for part in value.split(",") if part.strip() != ""]
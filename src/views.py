@@ -11,16 +11,34 @@ from constants import (
     SELECT_OPTION_LABEL_MAX_LENGTH,
     EMBED_FIELD_VALUE_MAX_LENGTH,
     ELEMENT_DESCRIPTION_MAX_LENGTH,
+    STREAMED_EDIT_INTERVAL,
+)
+from concurrency import Debouncer
+from embed_cache import EmbedCache
+from metrics import instrument_command
+from models import SyntaxElement, GuildConfig
+from paging import SearchCursor
+from providers import (
+    DocumentationProvider,
+    CombinedDocumentationProvider,
+    prefetch_elements_for_display,
 )
-from models import SearchOptions, SyntaxElement, GuildConfig
-from providers import DocumentationProvider, CombinedDocumentationProvider
 
 
 class SearchView(discord.ui.View):
+    embed_cache = EmbedCache()
 
     @staticmethod
     async def generate_embed(element: SyntaxElement) -> discord.Embed:
         await element.provider.prepare_element_for_display(element)
+        embed = SearchView.embed_cache.get(element)
+        if embed is None:
+            embed = SearchView._render_embed(element)
+            SearchView.embed_cache.set(element, embed)
+        return embed
+
+    @staticmethod
+    def _render_embed(element: SyntaxElement) -> discord.Embed:
         if element.description is not None and element.description != "":
             if len(element.description) > 200:
                 clamped_description = element.description[
@@ -87,41 +105,75 @@ class SearchView(discord.ui.View):
     def __init__(
         self,
         original_interaction: discord.Interaction,
+        cursor: SearchCursor,
+        page: int,
         elements: Sequence[SyntaxElement],
         available_providers: Sequence[DocumentationProvider],
-        enabled_providers: Sequence[DocumentationProvider],
-        search_options: SearchOptions,
         guild_config: GuildConfig,
         recent_users: Sequence[User],
         default_recent_user_id: int,
     ):
         super().__init__(timeout=INTERACTION_TIMEOUT.total_seconds())
-        self.search_options = search_options
+        self.search_options = cursor.options
         self.original_interaction = original_interaction
-        self.elements = elements[: MAX_SELECT_OPTION_COUNT - 1]
         self.guild_config = guild_config
-
         self.available_providers = available_providers
-        self.combined_provider = CombinedDocumentationProvider(enabled_providers)
+        self.reply_to = default_recent_user_id
+        self.recent_users = recent_users
+        self.user_interacted = False
+        self._streamed_edits = Debouncer(
+            STREAMED_EDIT_INTERVAL, self._edit_streamed_results
+        )
+        self._show_results(cursor, page, elements)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        self.user_interacted = True
+        return True
+
+    def show_streamed_results(self, elements: Sequence[SyntaxElement]) -> None:
+        # results arriving after the user started using the view stay available through the source selector
+        if self.user_interacted or self.is_finished() or len(elements) == 0:
+            return
+        self._show_results(self.cursor, self.page, elements)
+        self._streamed_edits.trigger()
+
+    async def _edit_streamed_results(self) -> None:
+        if self.user_interacted or self.is_finished():
+            return
+        await self.original_interaction.edit_original_response(
+            view=self, embeds=(await SearchView.generate_embed(self.elements[0]),)
+        )
+
+    def _show_results(
+        self, cursor: SearchCursor, page: int, elements: Sequence[SyntaxElement]
+    ) -> None:
+        self.clear_items()
+        self.cursor = cursor
+        self.page = page
+        self.elements = elements[: MAX_SELECT_OPTION_COUNT - 1]
+        prefetch_elements_for_display(self.elements)
+        self.combined_provider = cursor.provider
 
         self.element_select_menu = self._create_element_select_menu(self.elements)
+        if page > 0 or cursor.has_next_page(page):
+            first_result = page * cursor.page_size + 1
+            self.element_select_menu.placeholder = (
+                f"Results {first_result}-{first_result + len(self.elements) - 1}"
+            )
         if len(elements) > 0:
             self._set_selected_element(self.elements[0])
         self.add_item(self.element_select_menu)
 
-        self.reply_to = default_recent_user_id
-        self.recent_users = recent_users
-        self.default_recent_user_id = default_recent_user_id
         if (
-            isinstance(original_interaction.channel, TextChannel)
-            and len(recent_users) > 0
+            isinstance(self.original_interaction.channel, TextChannel)
+            and len(self.recent_users) > 0
         ):
             self.reply_select_menu = self._create_reply_select_menu(
-                self.recent_users, default_recent_user_id
+                self.recent_users, self.reply_to
             )
             self.add_item(self.reply_select_menu)
 
-        if not guild_config.enforce_preferred_providers:
+        if not self.guild_config.enforce_preferred_providers:
             self.provider_select_menu = self._create_provider_select_menu(
                 self.available_providers
             )
@@ -141,6 +193,20 @@ class SearchView(discord.ui.View):
         self.cancel_button.callback = self.handle_cancel
         self.add_item(self.cancel_button)
 
+        if page > 0 or cursor.has_next_page(page):
+            self.previous_page_button = discord.ui.Button(
+                label="Previous", style=ButtonStyle.grey, disabled=page == 0
+            )
+            self.previous_page_button.callback = self.handle_previous_page
+            self.add_item(self.previous_page_button)
+            self.next_page_button = discord.ui.Button(
+                label="Next",
+                style=ButtonStyle.grey,
+                disabled=not cursor.has_next_page(page),
+            )
+            self.next_page_button.callback = self.handle_next_page
+            self.add_item(self.next_page_button)
+
     def _create_reply_select_menu(
         self, users: Sequence[discord.User], default_recent_user_id: int
     ) -> Select:
@@ -192,6 +258,11 @@ class SearchView(discord.ui.View):
                     label=provider.name,
                     value=provider.name,
                     default=(provider.name in enabled_provider_names),
+                    description=(
+                        None
+                        if provider.is_available
+                        else "Currently failing, skipped until it recovers"
+                    ),
                 )
                 for provider in providers
             ),
@@ -212,11 +283,12 @@ class SearchView(discord.ui.View):
         await self.original_interaction.edit_original_response(view=self)
         self.stop()
 
+    @instrument_command("docs.reply_select")
     async def handle_reply_select(self, interaction: discord.Interaction):
         await interaction.response.defer()
         self.reply_to = next(iter(self.reply_select_menu.values), None)
-        self.default_recent_user_id = self.reply_to
 
+    @instrument_command("docs.element_select")
     async def handle_element_select(self, interaction: discord.Interaction):
         await interaction.response.defer()
         selected_element = next(
@@ -229,6 +301,7 @@ class SearchView(discord.ui.View):
             view=self, embeds=(await SearchView.generate_embed(selected_element),)
         )
 
+    @instrument_command("docs.provider_select")
     async def handle_provider_select(self, interaction: discord.Interaction):
         await interaction.response.defer()
         selected_providers = tuple(
@@ -236,45 +309,52 @@ class SearchView(discord.ui.View):
             for provider in self.available_providers
             if provider.name in self.provider_select_menu.values
         )
-        new_combined_provider = CombinedDocumentationProvider(selected_providers)
-        results = await new_combined_provider.perform_search(self.search_options)
+        # results of providers that were enabled before are reused, so only newly enabled ones are searched
+        cursor = SearchCursor(
+            CombinedDocumentationProvider(selected_providers),
+            self.search_options,
+            provider_results=self.cursor.provider_results,
+        )
+        results = await cursor.fetch_page(0)
+        self._show_results(cursor, 0, results)
         if len(results) > 0:
-            self.element_select_menu.disabled = False
-            self.confirm_button.disabled = False
             await self.original_interaction.edit_original_response(
                 content="",
-                view=SearchView(
-                    self.original_interaction,
-                    results,
-                    self.available_providers,
-                    selected_providers,
-                    self.search_options,
-                    self.guild_config,
-                    self.recent_users,
-                    self.default_recent_user_id,
-                ),
+                view=self,
                 embeds=(await SearchView.generate_embed(results[0]),),
             )
         else:
             query = self.search_options.query
             queried_providers = utils.join_english_or(
-                tuple(provider.name for provider in new_combined_provider.providers)
+                tuple(provider.name for provider in selected_providers)
             )
             await self.original_interaction.edit_original_response(
                 content=f"No results found for {discord.utils.escape_markdown(query)} on {queried_providers}",
-                view=SearchView(
-                    self.original_interaction,
-                    results,
-                    self.available_providers,
-                    selected_providers,
-                    self.search_options,
-                    self.guild_config,
-                    self.recent_users,
-                    self.reply_to
-                ),
+                view=self,
                 embeds=tuple(),
             )
 
+    async def _show_page(self, page: int) -> None:
+        results = await self.cursor.fetch_page(page)
+        if len(results) == 0:
+            return
+        self._show_results(self.cursor, page, results)
+        await self.original_interaction.edit_original_response(
+            view=self,
+            embeds=(await SearchView.generate_embed(results[0]),),
+        )
+
+    @instrument_command("docs.previous_page")
+    async def handle_previous_page(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        await self._show_page(self.page - 1)
+
+    @instrument_command("docs.next_page")
+    async def handle_next_page(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        await self._show_page(self.page + 1)
+
+    @instrument_command("docs.confirm")
     async def handle_confirm(self, interaction: discord.Interaction):
         await interaction.response.defer()
         self.stop()
@@ -295,6 +375,7 @@ class SearchView(discord.ui.View):
             )
         await original_response.delete()
 
+    @instrument_command("docs.cancel")
     async def handle_cancel(self, interaction: discord.Interaction):
         await interaction.response.defer()
 
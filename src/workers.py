@@ -0,0 +1,79 @@
+import logging
+import os
+import signal
+import subprocess
+import time
+from typing import Sequence, Optional
+
+from constants import (
+    SHARD_IDENTIFY_INTERVAL,
+    WORKER_RESTART_DELAY,
+    WORKER_SHUTDOWN_TIMEOUT,
+)
+
+
+def compute_shard_ranges(shard_count: int, worker_count: int) -> list[range]:
+    if worker_count > shard_count:
+        raise ValueError(
+            f"Cannot spread {shard_count} shards over {worker_count} workers"
+        )
+    shards_per_worker, remaining_shards = divmod(shard_count, worker_count)
+    shard_ranges = []
+    start = 0
+    for index in range(worker_count):
+        end = start + shards_per_worker + (1 if index < remaining_shards else 0)
+        shard_ranges.append(range(start, end))
+        start = end
+    return shard_ranges
+
+
+def _raise_keyboard_interrupt(signal_number, frame) -> None:
+    raise KeyboardInterrupt()
+
+
+def run_workers(command: Sequence[str], shard_count: int, worker_count: int) -> None:
+    shard_ranges = compute_shard_ranges(shard_count, worker_count)
+    workers: list[Optional[subprocess.Popen]] = [None] * worker_count
+
+    def start_worker(index: int) -> None:
+        shard_ids = ",".join(str(shard_id) for shard_id in shard_ranges[index])
+        environment = {
+            **os.environ,
+            "SKRIPT_WORKER_INDEX": str(index),
+            "SKRIPT_SHARD_COUNT": str(shard_count),
+            "SKRIPT_SHARD_IDS": shard_ids,
+        }
+        workers[index] = subprocess.Popen(command, env=environment)
+        logging.info(f"Started worker {index} for shards {shard_ids}")
+
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    try:
+        for index in range(worker_count):
+            if index > 0:
+                # every shard has to identify with the gateway on its own, which Discord rate limits
+                time.sleep(
+                    len(shard_ranges[index - 1]) * SHARD_IDENTIFY_INTERVAL.total_seconds()
+                )
+            start_worker(index)
+        while True:
+            time.sleep(1)
+            for index, worker in enumerate(workers):
+                if worker.poll() is not None:
+                    logging.warning(
+                        f"Worker {index} exited with code {worker.returncode}, restarting it"
+                    )
+                    time.sleep(WORKER_RESTART_DELAY.total_seconds())
+                    start_worker(index)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            if worker is not None and worker.poll() is None:
+                worker.send_signal(signal.SIGINT)
+        for worker in workers:
+            if worker is None:
+                continue
+            try:
+                worker.wait(WORKER_SHUTDOWN_TIMEOUT.total_seconds())
+            except subprocess.TimeoutExpired:
+                worker.kill()